@@ -1,19 +1,45 @@
 import os
+import uuid
 import base64
-from typing import List, Dict, Any, Optional
+import asyncio
+import logging
+import httpx
+import orjson
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Union, Callable, Tuple
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from .utils import logger
+from .utils import logger, create_http_client, is_transient_error, TRANSIENT_STATUS_CODES
+
+GMAIL_API_BASE = 'https://gmail.googleapis.com'
+GMAIL_BATCH_PATH = '/batch/gmail/v1'
+
+# Gmail batch endpoint accepts up to 100 calls, but recommends 50 to avoid rate limiting
+BATCH_SIZE = 50
+MAX_CONCURRENT_BATCHES = 4
+MAX_CONCURRENT_FETCHES = 5
+
+# Message headers copied into the parsed message
+WANTED_HEADERS = frozenset({'subject', 'from', 'to', 'date'})
+
+# Refresh the access token in the background once it is this close to expiry
+TOKEN_STALE_WINDOW = timedelta(minutes=5)
 
 # Global clients
-gmail_service = None
+gmail_creds: Optional[Credentials] = None
+user_email = 'me'
+http_client: Optional[httpx.AsyncClient] = None
+
+# Only one token refresh runs at a time
+_refresh_lock = asyncio.Lock()
+_refresh_task: Optional[asyncio.Task] = None
 
 def init_gmail_client():
     """Initialize Gmail client with OAuth2 credentials from environment variables"""
-    global gmail_service
+    global gmail_creds, http_client, user_email
     
+    user_email = os.getenv('GOOGLE_USER_EMAIL') or 'me'
     client_id = os.getenv('GOOGLE_CLIENT_ID')
     client_secret = os.getenv('GOOGLE_CLIENT_SECRET')
     refresh_token = os.getenv('GOOGLE_REFRESH_TOKEN')
@@ -24,6 +50,16 @@ def init_gmail_client():
             'Set GOOGLE_CLIENT_ID, GOOGLE_CLIENT_SECRET, and GOOGLE_REFRESH_TOKEN env vars.'
         )
 
+    # Reused across poll cycles so Gmail requests keep their TLS connection warm;
+    # recreated here after close_gmail_client() even when the credentials are kept
+    if http_client is None:
+        http_client = create_http_client(GMAIL_API_BASE, timeout=30.0)
+
+    # Keep existing credentials (and their access token) across poll cycles
+    if gmail_creds and gmail_creds.refresh_token == refresh_token and gmail_creds.client_id == client_id:
+        logger.debug('Gmail client already initialized')
+        return
+
     creds = Credentials(
         None,
         refresh_token=refresh_token,
@@ -32,30 +68,73 @@ def init_gmail_client():
         client_secret=client_secret,
     )
 
-    if creds and creds.expired and creds.refresh_token:
-        creds.refresh(Request())
+    gmail_creds = creds
 
-    gmail_service = build('gmail', 'v1', credentials=creds)
     logger.info('Gmail client initialized')
 
+async def close_gmail_client():
+    """Close the shared Gmail HTTP client"""
+    global http_client
+    if http_client:
+        await http_client.aclose()
+        http_client = None
+
+async def _refresh_token():
+    """Refresh the access token off the event loop"""
+    async with _refresh_lock:
+        if gmail_creds.valid and not _is_stale(gmail_creds):
+            return
+        logger.debug('Refreshing Gmail access token')
+        await asyncio.to_thread(gmail_creds.refresh, Request())
+
+async def _background_refresh():
+    """Refresh the access token without failing the request that triggered it"""
+    try:
+        await _refresh_token()
+    except Exception as e:
+        logger.warning(f"Background token refresh failed: {str(e)}")
+
+def _is_stale(creds: Credentials) -> bool:
+    """Check whether the access token expires within the stale window"""
+    return bool(creds.expiry) and creds.expiry - datetime.utcnow() < TOKEN_STALE_WINDOW
+
+async def get_valid_token() -> str:
+    """Return an access token, refreshing in the background when it is about to expire"""
+    global _refresh_task
+
+    if not gmail_creds.valid:
+        # No usable token yet: callers have to wait for the refresh
+        await _refresh_token()
+    elif _is_stale(gmail_creds) and (_refresh_task is None or _refresh_task.done()):
+        # Still valid: keep serving it while a new one is fetched
+        _refresh_task = asyncio.create_task(_background_refresh())
+
+    return gmail_creds.token
+
+async def _auth_headers() -> Dict[str, str]:
+    """Authorization header for Gmail REST calls"""
+    return {'Authorization': f"Bearer {await get_valid_token()}"}
+
 async def list_messages(query: str, max_results: int = 10, include_spam_trash: bool = True) -> List[Dict[str, str]]:
     """List messages matching query"""
-    if not gmail_service:
+    if not http_client:
         raise RuntimeError('Gmail client not initialized. Call init_gmail_client() first.')
 
-    user_email = os.getenv('GOOGLE_USER_EMAIL', 'me')
-
     try:
-        logger.debug(f"Listing messages with query: {query} include_spam_trash: {include_spam_trash}")
+        logger.debug("Listing messages with query: %s include_spam_trash: %s", query, include_spam_trash)
 
-        response = gmail_service.users().messages().list(
-            userId=user_email,
-            q=query,
-            maxResults=max_results,
-            includeSpamTrash=include_spam_trash
-        ).execute()
+        response = await http_client.get(
+            f"/gmail/v1/users/{user_email}/messages",
+            params={
+                'q': query,
+                'maxResults': max_results,
+                'includeSpamTrash': include_spam_trash
+            },
+            headers=await _auth_headers()
+        )
+        response.raise_for_status()
 
-        messages = response.get('messages', [])
+        messages = orjson.loads(response.content).get('messages', [])
         logger.info(f"Found {len(messages)} messages matching query")
 
         return messages
@@ -65,49 +144,231 @@ async def list_messages(query: str, max_results: int = 10, include_spam_trash: b
 
 async def get_message(message_id: str) -> Dict[str, Any]:
     """Get full message details"""
-    if not gmail_service:
+    if not http_client:
         raise RuntimeError('Gmail client not initialized. Call init_gmail_client() first.')
 
-    user_email = os.getenv('GOOGLE_USER_EMAIL', 'me')
-
     try:
-        logger.debug(f"Fetching message: {message_id}")
-
-        message = gmail_service.users().messages().get(
-            userId=user_email,
-            id=message_id,
-            format='full'
-        ).execute()
-
-        # Parse headers
-        headers = {}
-        payload = message.get('payload', {})
-        for header in payload.get('headers', []):
-            headers[header['name'].lower()] = header['value']
-
-        # Extract body
-        body = extract_body(payload)
-
-        # Build parsed message object
-        parsed = {
-            'id': message['id'],
-            'threadId': message['threadId'],
-            'labelIds': message.get('labelIds', []),
-            'subject': headers.get('subject', ''),
-            'from': headers.get('from', ''),
-            'to': headers.get('to', ''),
-            'date': headers.get('date', ''),
-            'snippet': message.get('snippet', ''),
-            'body': body
-        }
-
-        logger.debug(f"Message fetched and basic-parsed: {{'id': {parsed['id']}, 'subject': {parsed['subject']}, 'from': {parsed['from']}, 'labels': {', '.join(parsed['labelIds'])}}}")
+        logger.debug("Fetching message: %s", message_id)
+
+        response = await http_client.get(
+            f"/gmail/v1/users/{user_email}/messages/{message_id}",
+            params={'format': 'full'},
+            headers=await _auth_headers()
+        )
+        response.raise_for_status()
+        message = orjson.loads(response.content)
+
+        parsed = parse_gmail_message(message)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Message fetched and basic-parsed: id=%s subject=%s from=%s labels=%s",
+                parsed['id'], parsed['subject'], parsed['from'], ', '.join(parsed['labelIds'])
+            )
 
         return parsed
     except Exception as e:
         logger.error(f"Failed to get message: {str(e)}")
         raise e
 
+def parse_gmail_message(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Build parsed message object from a Gmail API message resource"""
+    # Parse headers, keeping only the ones we use
+    payload = message.get('payload', {})
+    headers = {
+        name: header['value']
+        for header in payload.get('headers', ())
+        if (name := header['name'].lower()) in WANTED_HEADERS
+    }
+
+    # Extract body
+    body = extract_body(payload)
+
+    # Build parsed message object
+    parsed = {
+        'id': message['id'],
+        'threadId': message['threadId'],
+        'labelIds': message.get('labelIds', []),
+        'subject': headers.get('subject', ''),
+        'from': headers.get('from', ''),
+        'to': headers.get('to', ''),
+        'date': headers.get('date', ''),
+        'snippet': message.get('snippet', ''),
+        'body': body
+    }
+
+    return parsed
+
+async def get_messages_bulk(ids: List[str]) -> List[Dict[str, Any]]:
+    """Get full message details for many messages using the Gmail batch endpoint"""
+    if not http_client:
+        raise RuntimeError('Gmail client not initialized. Call init_gmail_client() first.')
+
+    # Batches run concurrently, bounded to stay within per-user QPS limits
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BATCHES)
+
+    async def fetch_chunk(chunk: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        async with semaphore:
+            try:
+                return await _fetch_batch(chunk)
+            except Exception as e:
+                # A rate-limited, 5xx or dropped batch request is retried id by id;
+                # any other failure would fail the same way per message
+                return [], chunk if _is_retryable(e) else []
+
+    chunks = [ids[start:start + BATCH_SIZE] for start in range(0, len(ids), BATCH_SIZE)]
+    batches = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+    results = [message for messages, _ in batches for message in messages]
+
+    # Only transient failures are retried; 404/403 parts (e.g. deleted messages) are not
+    retry_ids = [message_id for _, retry in batches for message_id in retry]
+    if retry_ids:
+        results.extend(await _fetch_individually(retry_ids))
+
+    # Callers process messages in list order (newest first), not in fetch order
+    by_id = {message['id']: message for message in results}
+    results = [by_id[message_id] for message_id in ids if message_id in by_id]
+
+    logger.info(f"Fetched {len(results)}/{len(ids)} messages via batch")
+    return results
+
+async def _fetch_individually(ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch messages one request each, concurrently, skipping the ones that fail"""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+
+    async def fetch(message_id: str) -> Dict[str, Any]:
+        async with semaphore:
+            return await get_message(message_id)
+
+    fetched = await asyncio.gather(*(fetch(message_id) for message_id in ids), return_exceptions=True)
+
+    results = []
+    for message_id, message in zip(ids, fetched):
+        if isinstance(message, Exception):
+            logger.error(f"Failed to refetch message {message_id}: {str(message)}")
+            continue
+        results.append(message)
+    return results
+
+def _is_retryable(error: Exception) -> bool:
+    """Check if a failed request is worth retrying (transport error, timeout, 429, 5xx)"""
+    return isinstance(error, httpx.TransportError) or is_transient_error(error)
+
+async def _fetch_batch(chunk: List[str]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Fetch and parse one batch of at most BATCH_SIZE messages, plus the ids worth retrying"""
+    results = []
+    answered = set()
+    retry_ids = []
+
+    try:
+        logger.debug("Fetching batch of %d messages", len(chunk))
+
+        boundary = f"batch_{uuid.uuid4().hex}"
+        response = await http_client.post(
+            GMAIL_BATCH_PATH,
+            content=build_batch_body(chunk, user_email, boundary),
+            headers={
+                **(await _auth_headers()),
+                'Content-Type': f"multipart/mixed; boundary={boundary}"
+            }
+        )
+        response.raise_for_status()
+
+        parts = parse_batch_response(response.text, response.headers.get('content-type', ''))
+        chunk_ids = set(chunk)
+        for index, (status, message, content_id) in enumerate(parts):
+            # Content-ID names the message; fall back to position if it is missing
+            message_id = content_id if content_id in chunk_ids else chunk[index] if index < len(chunk) else None
+            answered.add(message_id)
+            if status != 200:
+                logger.error(f"Failed to get message {message_id} in batch: HTTP {status} {message}")
+                if status in TRANSIENT_STATUS_CODES:
+                    retry_ids.append(message_id)
+                continue
+            results.append(parse_gmail_message(message))
+    except Exception as e:
+        logger.error(f"Failed to get message batch: {str(e)}")
+        raise e
+
+    # Ids the batch response left out entirely are retried too
+    retry_ids.extend(message_id for message_id in chunk if message_id not in answered)
+    return results, retry_ids
+
+async def list_and_fetch(
+    query: str,
+    max_results: int = 10,
+    include_spam_trash: bool = True,
+    select: Optional[Callable[[List[str]], List[str]]] = None
+) -> Tuple[List[Dict[str, str]], List[Dict[str, Any]]]:
+    """List messages matching query, then batch-fetch the ids returned by select"""
+    messages = await list_messages(query, max_results, include_spam_trash)
+
+    ids = [m['id'] for m in messages]
+    if select is not None:
+        ids = select(ids)
+    if not ids:
+        return messages, []
+
+    return messages, await get_messages_bulk(ids)
+
+def build_batch_body(ids: List[str], user_email: str, boundary: str) -> str:
+    """Build multipart/mixed body with one messages.get call per part"""
+    parts = []
+    for message_id in ids:
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: application/http\r\n"
+            f"Content-ID: <{message_id}>\r\n"
+            f"\r\n"
+            f"GET /gmail/v1/users/{user_email}/messages/{message_id}?format=full\r\n"
+            f"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return ''.join(parts)
+
+def parse_batch_response(text: str, content_type: str) -> List[tuple]:
+    """Split a multipart/mixed batch response into (status, json body, content id) tuples"""
+    boundary = None
+    for param in content_type.split(';'):
+        name, _, value = param.strip().partition('=')
+        if name.lower() == 'boundary':
+            boundary = value.strip('"')
+    if not boundary:
+        raise RuntimeError(f"Batch response missing multipart boundary: {content_type}")
+
+    results = []
+    for part in text.split(f"--{boundary}"):
+        part = part.strip()
+        if not part or part == '--':
+            continue
+
+        # Part headers, then embedded HTTP response (status line + headers), then JSON body
+        sections = part.replace('\r\n', '\n').split('\n\n', 2)
+        if len(sections) < 3:
+            continue
+        part_head, http_head, body = sections
+
+        # Responses echo the request's Content-ID with a "response-" prefix
+        content_id = None
+        for line in part_head.split('\n'):
+            name, _, value = line.partition(':')
+            if name.strip().lower() == 'content-id':
+                content_id = value.strip().strip('<>').removeprefix('response-')
+
+        status_line = http_head.split('\n', 1)[0]
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            logger.warning(f"Malformed batch part status line: {status_line}")
+            continue
+
+        try:
+            results.append((status, orjson.loads(body), content_id))
+        except ValueError:
+            results.append((status, {'raw': body}, content_id))
+
+    return results
+
 def extract_body(payload: Dict[str, Any]) -> str:
     """Extract body from message payload"""
     if not payload:
@@ -121,49 +382,55 @@ def extract_body(payload: Dict[str, Any]) -> str:
     # Multi-part message
     parts = payload.get('parts', [])
     if parts:
-        html_parts = []
-        text_parts = []
-
-        def traverse_parts(inner_parts):
-            for part in inner_parts:
-                mime_type = part.get('mimeType')
-                data = part.get('body', {}).get('data')
-                
-                if mime_type == 'text/html' and data:
-                    html_parts.append(decode_base64url(data))
-                elif mime_type == 'text/plain' and data:
-                    text_parts.append(decode_base64url(data))
+        html_parts: List[str] = []
+        text_parts: List[str] = []
+
+        # One lookup per part instead of chained mime type comparisons
+        dispatch = {'text/html': html_parts.append, 'text/plain': text_parts.append}
+
+        # Depth-first walk with an explicit stack, keeping the original part order
+        stack = list(reversed(parts))
+        while stack:
+            part = stack.pop()
+            handler = dispatch.get(part.get('mimeType'))
+            data = part.get('body', {}).get('data')
+
+            if handler and data:
+                content = decode_base64url(data)
+                handler(content)
 
                 # Handle attachments that are text/html
                 filename = part.get('filename')
-                if filename and data:
-                    if mime_type in ['text/plain', 'text/html']:
-                        logger.debug(f"Extracting content from attachment: {filename}")
-                        content = decode_base64url(data)
-                        if mime_type == 'text/html':
-                            html_parts.append(content)
-                        else:
-                            text_parts.append(content)
+                if filename:
+                    logger.debug("Extracting content from attachment: %s", filename)
+                    handler(content)
 
-                if 'parts' in part:
-                    traverse_parts(part['parts'])
-
-        traverse_parts(parts)
+            if 'parts' in part:
+                stack.extend(reversed(part['parts']))
 
+        # Most messages have a single part of each type: skip the join
         if html_parts:
-            return '\n<hr>\n'.join(html_parts)
+            return html_parts[0] if len(html_parts) == 1 else '\n<hr>\n'.join(html_parts)
         if text_parts:
-            return '\n---\n'.join(text_parts)
+            return text_parts[0] if len(text_parts) == 1 else '\n---\n'.join(text_parts)
 
     return ''
 
-def decode_base64url(data: str) -> str:
+def decode_base64url(data: Union[str, bytes]) -> str:
     """Decode base64url-encoded string used by Gmail API"""
     if not data:
         return ''
     try:
-        decoded_bytes = base64.urlsafe_b64decode(data + '=' * (4 - len(data) % 4))
-        return decoded_bytes.decode('utf-8', errors='replace')
+        raw = data.encode('ascii', 'ignore') if isinstance(data, str) else data
+        # Gmail strips padding; (-n) & 3 restores it without adding a full "====" block
+        pad = (-len(raw)) & 3
+        if pad:
+            raw += b'=' * pad
+        decoded_bytes = base64.urlsafe_b64decode(raw)
     except Exception as e:
         logger.warning(f"Failed to decode base64url: {str(e)}")
         return ''
+    try:
+        return decoded_bytes.decode('utf-8')
+    except UnicodeDecodeError:
+        return decoded_bytes.decode('utf-8', errors='replace')
@@ -1,116 +1,135 @@
 import os
+import gzip
 import asyncio
+import httpx
+import orjson
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, Response, ORJSONResponse
 from .watcher import run_poll_cycle, start_continuous_polling
 from .utils import logger
 from .storage import close_storage
-from .notifier import test_connection, send_reply
+from .notifier import test_connection, send_reply, close_telegram_client, is_production
+from .gmail_client import close_gmail_client
 
-app = FastAPI(title="TLScontact Gmail Watcher")
+app = FastAPI(title="TLScontact Gmail Watcher", default_response_class=ORJSONResponse)
+
+ROOT_HTML = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>TLScontact Watcher Status</title>
+    <style>
+        :root {
+            --primary: #2E7D32;
+            --bg: #f5f5f5;
+            --card-bg: #ffffff;
+            --text: #333333;
+        }
+        body {
+            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+            background-color: var(--bg);
+            color: var(--text);
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            height: 100vh;
+            margin: 0;
+        }
+        .card {
+            background: var(--card-bg);
+            padding: 2.5rem;
+            border-radius: 16px;
+            box-shadow: 0 10px 25px rgba(0,0,0,0.05);
+            text-align: center;
+            max-width: 400px;
+            width: 90%;
+            border-top: 5px solid var(--primary);
+        }
+        .status-indicator {
+            width: 15px;
+            height: 15px;
+            background-color: var(--primary);
+            border-radius: 50%;
+            display: inline-block;
+            margin-right: 8px;
+            box-shadow: 0 0 10px var(--primary);
+            animation: pulse 2s infinite;
+        }
+        @keyframes pulse {
+            0% { opacity: 1; }
+            50% { opacity: 0.5; }
+            100% { opacity: 1; }
+        }
+        h1 { margin: 10px 0; color: var(--primary); }
+        p { color: #666; line-height: 1.6; }
+        .badge {
+            background: #E8F5E9;
+            color: var(--primary);
+            padding: 5px 12px;
+            border-radius: 20px;
+            font-size: 0.85rem;
+            font-weight: 600;
+            display: inline-block;
+            margin-top: 15px;
+        }
+        .footer {
+            margin-top: 25px;
+            font-size: 0.8rem;
+            color: #999;
+        }
+        .btn {
+            display: inline-block;
+            margin-top: 20px;
+            padding: 10px 20px;
+            background: var(--primary);
+            color: white;
+            text-decoration: none;
+            border-radius: 8px;
+            font-weight: 500;
+            transition: transform 0.2s;
+        }
+        .btn:hover { transform: translateY(-2px); }
+    </style>
+</head>
+<body>
+    <div class="card">
+        <div class="status-indicator"></div>
+        <h1>Watcher Online</h1>
+        <p>The TLScontact Gmail Watcher service is running and monitoring your inbox for appointment updates.</p>
+        <div class="badge">Healthy & Monitoring</div>
+        <div style="margin-top: 20px;">
+            <a href="/test-telegram" class="btn">Test Telegram Notification</a>
+        </div>
+        <div class="footer">
+            FastAPI • Python • TLScontact Watcher
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+# Encoded once at import; served as-is on every hit
+ROOT_HTML_BYTES = ROOT_HTML.encode('utf-8')
+ROOT_HTML_GZIP = gzip.compress(ROOT_HTML_BYTES, 9)
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+async def root(request: Request):
     """Root endpoint with HTML status page"""
-    html_content = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>TLScontact Watcher Status</title>
-        <style>
-            :root {
-                --primary: #2E7D32;
-                --bg: #f5f5f5;
-                --card-bg: #ffffff;
-                --text: #333333;
-            }
-            body {
-                font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                background-color: var(--bg);
-                color: var(--text);
-                display: flex;
-                justify-content: center;
-                align-items: center;
-                height: 100vh;
-                margin: 0;
-            }
-            .card {
-                background: var(--card-bg);
-                padding: 2.5rem;
-                border-radius: 16px;
-                box-shadow: 0 10px 25px rgba(0,0,0,0.05);
-                text-align: center;
-                max-width: 400px;
-                width: 90%;
-                border-top: 5px solid var(--primary);
-            }
-            .status-indicator {
-                width: 15px;
-                height: 15px;
-                background-color: var(--primary);
-                border-radius: 50%;
-                display: inline-block;
-                margin-right: 8px;
-                box-shadow: 0 0 10px var(--primary);
-                animation: pulse 2s infinite;
-            }
-            @keyframes pulse {
-                0% { opacity: 1; }
-                50% { opacity: 0.5; }
-                100% { opacity: 1; }
-            }
-            h1 { margin: 10px 0; color: var(--primary); }
-            p { color: #666; line-height: 1.6; }
-            .badge {
-                background: #E8F5E9;
-                color: var(--primary);
-                padding: 5px 12px;
-                border-radius: 20px;
-                font-size: 0.85rem;
-                font-weight: 600;
-                display: inline-block;
-                margin-top: 15px;
-            }
-            .footer {
-                margin-top: 25px;
-                font-size: 0.8rem;
-                color: #999;
-            }
-            .btn {
-                display: inline-block;
-                margin-top: 20px;
-                padding: 10px 20px;
-                background: var(--primary);
-                color: white;
-                text-decoration: none;
-                border-radius: 8px;
-                font-weight: 500;
-                transition: transform 0.2s;
-            }
-            .btn:hover { transform: translateY(-2px); }
-        </style>
-    </head>
-    <body>
-        <div class="card">
-            <div class="status-indicator"></div>
-            <h1>Watcher Online</h1>
-            <p>The TLScontact Gmail Watcher service is running and monitoring your inbox for appointment updates.</p>
-            <div class="badge">Healthy & Monitoring</div>
-            <div style="margin-top: 20px;">
-                <a href="/test-telegram" class="btn">Test Telegram Notification</a>
-            </div>
-            <div class="footer">
-                FastAPI • Python • TLScontact Watcher
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    return HTMLResponse(content=html_content)
+    headers = {'Cache-Control': 'public, max-age=300', 'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.headers.get('accept-encoding', ''):
+        headers['Content-Encoding'] = 'gzip'
+        return Response(content=ROOT_HTML_GZIP, media_type='text/html', headers=headers)
+    return Response(content=ROOT_HTML_BYTES, media_type='text/html', headers=headers)
+
+def _is_expected(e: Exception) -> bool:
+    """Network timeouts and Telegram 5xx responses are expected; no traceback needed"""
+    if isinstance(e, httpx.TimeoutException):
+        return True
+    return isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500
 
 @app.get("/test-telegram")
 async def trigger_test_telegram():
@@ -124,7 +143,10 @@ async def trigger_test_telegram():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Endpoint /test-telegram failed: {str(e)}", exc_info=True)
+        if _is_expected(e):
+            logger.warning("Endpoint /test-telegram failed: %s", e)
+        else:
+            logger.error("Endpoint /test-telegram failed: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=f"Unexpected Error: {str(e)}")
 
 @app.get("/debug/env")
@@ -143,12 +165,22 @@ async def debug_env():
         "is_production": bool(railway_env)
     }
 
+async def send_webhook_reply(chat_id: str, message_id: int, text: str):
+    """Send a webhook reply after the response has been returned to Telegram"""
+    try:
+        await send_reply(chat_id, message_id, text)
+    except Exception as e:
+        if _is_expected(e):
+            logger.warning("Webhook reply failed: %s", e)
+        else:
+            logger.error("Webhook reply failed: %s", e, exc_info=True)
+
 @app.post("/webhook")
-async def telegram_webhook(request: Request):
+async def telegram_webhook(request: Request, background_tasks: BackgroundTasks):
     """Handle incoming Telegram webhook updates"""
     try:
-        update = await request.json()
-        logger.debug(f"Received webhook update: {update}")
+        update = orjson.loads(await request.body())
+        logger.debug("Received webhook update: %s", update)
         
         # Check if this is a message update
         if 'message' not in update:
@@ -170,7 +202,6 @@ async def telegram_webhook(request: Request):
         is_test = text.lower().strip() == 'test'
         
         # Generate status response
-        from datetime import datetime
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         if is_test:
@@ -178,7 +209,7 @@ async def telegram_webhook(request: Request):
                 f"✅ <b>Test Received! Bot is Online.</b>\n\n"
                 f"<b>Status:</b> Healthy\n"
                 f"<b>Time:</b> {now}\n"
-                f"<b>Environment:</b> {'Production' if os.getenv('RAILWAY_ENVIRONMENT') else 'Local'}\n"
+                f"<b>Environment:</b> {'Production' if is_production() else 'Local'}\n"
                 f"<b>System:</b> Python/FastAPI monitoring TLScontact"
             )
         else:
@@ -188,13 +219,16 @@ async def telegram_webhook(request: Request):
                 f"The service is currently online and healthy."
             )
         
-        # Send reply
-        await send_reply(chat_id, message_id, response_text)
+        # Reply after responding so Telegram gets its 200 without waiting on the Bot API
+        background_tasks.add_task(send_webhook_reply, chat_id, message_id, response_text)
         
         return {"ok": True}
         
     except Exception as e:
-        logger.error(f"Webhook failed: {str(e)}", exc_info=True)
+        if _is_expected(e):
+            logger.warning("Webhook failed: %s", e)
+        else:
+            logger.error("Webhook failed: %s", e, exc_info=True)
         # Return 200 OK even on error to prevent Telegram from retrying
         return {"ok": False, "error": str(e)}
 
@@ -211,6 +245,8 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Service shutting down...")
     close_storage()
+    await close_telegram_client()
+    await close_gmail_client()
 
 @app.get("/health")
 async def health_check():
@@ -1,18 +1,51 @@
 import os
 import httpx
-from typing import Optional, Dict, Any
-from .utils import logger, retry_with_backoff, is_transient_error, RateLimiter
+import orjson
+from typing import Optional, Dict, Any, Tuple
+from .utils import logger, retry_with_backoff, is_transient_error, RateLimiter, create_http_client
 
 TELEGRAM_API_BASE = 'https://api.telegram.org'
+JSON_HEADERS = {'Content-Type': 'application/json'}
 
 # Rate limiter: max messages per run
 rate_limiter: Optional[RateLimiter] = None
 
+# Shared HTTP client so consecutive sends reuse the pooled TLS connection
+http_client: Optional[httpx.AsyncClient] = None
+
+# Credentials cached on first use
+bot_token: Optional[str] = None
+chat_id: Optional[str] = None
+
+# Read on first use rather than at import, so a value from .env is seen too
+_is_production: Optional[bool] = None
+
+def is_production() -> bool:
+    """Whether the app runs on Railway, cached after the first check"""
+    global _is_production
+    if _is_production is None:
+        _is_production = bool(os.getenv('RAILWAY_ENVIRONMENT'))
+    return _is_production
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Return the shared Telegram HTTP client, creating it on first use"""
+    global http_client
+    if http_client is None:
+        http_client = create_http_client(TELEGRAM_API_BASE)
+    return http_client
+
+def _get_credentials() -> Tuple[Optional[str], Optional[str]]:
+    """Return cached Telegram credentials, reading env vars until both are set"""
+    global bot_token, chat_id
+    if not bot_token or not chat_id:
+        bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
+        chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    return bot_token, chat_id
+
 def init_telegram_client():
     """Initialize Telegram client settings"""
     global rate_limiter
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    bot_token, chat_id = _get_credentials()
 
     if not bot_token or not chat_id:
         raise RuntimeError(
@@ -24,13 +57,21 @@ def init_telegram_client():
     # Refill rate: 0.1 tokens/sec to mirror Node.js (max sends with slow refill)
     rate_limiter = RateLimiter(float(max_sends), 0.1)
 
+    _get_http_client()
+
     logger.info(f"Telegram client initialized. Chat ID: {chat_id}, Max sends per run: {max_sends}")
 
+async def close_telegram_client():
+    """Close the shared Telegram HTTP client"""
+    global http_client
+    if http_client:
+        await http_client.aclose()
+        http_client = None
+
 async def send_message(text: str, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """Send message to Telegram chat with retry and rate limiting"""
     options = options or {}
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
-    chat_id = os.getenv('TELEGRAM_CHAT_ID')
+    bot_token, chat_id = _get_credentials()
 
     if not bot_token or not chat_id:
         missing = []
@@ -42,7 +83,7 @@ async def send_message(text: str, options: Optional[Dict[str, Any]] = None) -> D
     if rate_limiter:
         await rate_limiter.acquire(1)
 
-    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    url = f"/bot{bot_token}/sendMessage"
 
     payload = {
         'chat_id': chat_id,
@@ -52,11 +93,10 @@ async def send_message(text: str, options: Optional[Dict[str, Any]] = None) -> D
     }
 
     async def _send():
-        async with httpx.AsyncClient() as client:
-            logger.debug('Sending Telegram message...')
-            response = await client.post(url, json=payload, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
+        logger.debug('Sending Telegram message...')
+        response = await _get_http_client().post(url, content=orjson.dumps(payload), headers=JSON_HEADERS)
+        response.raise_for_status()
+        return response.json()
 
     try:
         # Retry with backoff for transient errors
@@ -93,12 +133,12 @@ async def send_appointment_notification(parsed: Dict[str, Any], message_id: str)
 
 async def send_reply(chat_id: str, message_id: int, text: str) -> Dict[str, Any]:
     """Send a reply to a specific message"""
-    bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
+    bot_token, _ = _get_credentials()
     
     if not bot_token:
         raise RuntimeError('Telegram not configured: Missing TELEGRAM_BOT_TOKEN')
     
-    url = f"{TELEGRAM_API_BASE}/bot{bot_token}/sendMessage"
+    url = f"/bot{bot_token}/sendMessage"
     
     payload = {
         'chat_id': chat_id,
@@ -107,25 +147,28 @@ async def send_reply(chat_id: str, message_id: int, text: str) -> Dict[str, Any]
         'reply_to_message_id': message_id
     }
     
-    async with httpx.AsyncClient() as client:
-        logger.debug(f'Sending Telegram reply to message {message_id}...')
-        response = await client.post(url, json=payload, timeout=10.0)
-        response.raise_for_status()
-        result = response.json()
-        logger.info('Telegram reply sent successfully')
-        return result
+    logger.debug(f'Sending Telegram reply to message {message_id}...')
+    response = await _get_http_client().post(url, content=orjson.dumps(payload), headers=JSON_HEADERS)
+    response.raise_for_status()
+    result = response.json()
+    logger.info('Telegram reply sent successfully')
+    return result
+
+# Static parts of the status message; only the timestamp and environment change per call
+STATUS_PREFIX = (
+    "✅ <b>TLScontact Watcher is Online</b>\n\n"
+    "<b>Status:</b> Healthy\n"
+    "<b>Time:</b> "
+)
+STATUS_SUFFIX = "\n<b>System:</b> Python/FastAPI"
 
 async def test_connection() -> bool:
     """Test Telegram connection and report service status"""
     from datetime import datetime
-    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
+    environment = 'Production' if is_production() else 'Local'
     status_msg = (
-        f"✅ <b>TLScontact Watcher is Online</b>\n\n"
-        f"<b>Status:</b> Healthy\n"
-        f"<b>Time:</b> {now}\n"
-        f"<b>Environment:</b> {'Production' if os.getenv('RAILWAY_ENVIRONMENT') else 'Local'}\n"
-        f"<b>System:</b> Python/FastAPI"
+        STATUS_PREFIX + datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        + f"\n<b>Environment:</b> {environment}" + STATUS_SUFFIX
     )
     
     try:
@@ -1,21 +1,67 @@
 import re
-import dateparser
-from bs4 import BeautifulSoup
+import html
+from dateutil import parser as dateutil_parser
+from dateparser.date import DateDataParser
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from .utils import logger, format_date_iso, escape_html
 
-# TLScontact domain pattern
-TLS_DOMAIN_REGEX = re.compile(r'@(tlscontact\.|tls-contact\.|tlsvisa\.)', re.IGNORECASE)
+# google-re2 matches in linear time, so crafted email bodies cannot make the
+# body-scanning patterns backtrack; plain re is used when it is not installed
+try:
+    import re2
+except ImportError:
+    re2 = None
 
-# Keyword patterns for appointment/visa emails
-KEYWORD_REGEX = re.compile(
-    r'\b(rendez-?vous|rdv|visa|appointment|confirmer|confirmé|confirmed|rendezvous|confirmation|tlscontact|tls-contact)\b', 
-    re.IGNORECASE
+def compile_body_regex(pattern: str):
+    """Compile a pattern that runs on message text, with RE2 when available"""
+    if re2 is not None:
+        try:
+            return re2.compile(pattern)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+# TLS sender domain, TLS keywords (Node.js parity) and appointment keywords in one pass.
+# Every domain alternative also contains a TLS keyword, so outside the sender field
+# a 'dom' match counts as a keyword; 'both' words are TLS and appointment keywords.
+TLS_FUSED_REGEX = compile_body_regex(
+    r'(?i)(?P<dom>@(?:tlscontact\.|tls-contact\.|tlsvisa\.))'
+    r'|(?P<both>rendez-?vous|rdv)'
+    r'|(?P<appt>appointment)'
+    r'|(?P<kw>visa|tlscontact|tls-contact)'
 )
 
+# Appointment keywords, for parsed results that did not come from parse_message
+APPOINTMENT_REGEX = compile_body_regex(r'(?i)rendez-?vous|rdv|appointment')
+
 # Numeric date pattern (DD/MM/YYYY, DD-MM-YYYY, DD.MM.YYYY, etc.)
-DATE_NUMERIC_REGEX = re.compile(r'\b([0-3]?\d[\/\-\.\s][01]?\d[\/\-\.\s](?:\d{2}|\d{4}))\b')
+DATE_NUMERIC_REGEX = compile_body_regex(r'\b([0-3]?\d[\/\-\.\s][01]?\d[\/\-\.\s](?:\d{2}|\d{4}))\b')
+
+# Lines worth handing to dateparser: a day next to an English/French month name
+# (either order, also "1st of March" and "January, 15") or a numeric date fragment.
+# Everything else is skipped unparsed.
+DATE_MONTHS = r'(?:jan|f[eé]v|feb|mar|apr|avr|ma[iy]|jui?n|jui?l|aug|ao[uû]|sep|oct|nov|d[eé]c)'
+DATE_CANDIDATE_LINE_REGEX = compile_body_regex(
+    rf'(?im)^.*(?:\d{{1,2}}(?:er|st|nd|rd|th)?\s*(?:of\s+)?{DATE_MONTHS}|{DATE_MONTHS}[a-zéû]*[,.]?\s*\d{{1,2}}|\d{{1,2}}[/.\-]\d).*$'
+)
+
+# Link extraction: href of <a> tags, then bare URLs in plain text
+HREF_REGEX = compile_body_regex(r'(?i)<a\s[^>]*?href\s*=\s*["\']([^"\']+)["\']')
+URL_REGEX = compile_body_regex(r'(?i)https?://[^\s"<>|)]+')
+TRAILING_PUNCT_REGEX = re.compile(r'[.!?,;:]+$')
+TLS_LINK_REGEX = re.compile(r'tlscontact|confirm', re.IGNORECASE)
+
+# Shared date parser: restricting languages keeps dateparser from trying every locale,
+# and reusing one instance keeps its loaded language data between calls
+DATE_PARSER = DateDataParser(
+    languages=['en', 'fr'],
+    settings={
+        'PREFER_DATES_FROM': 'future',
+        'STRICT_PARSING': False,
+        'REQUIRE_PARTS': ['day', 'month']
+    }
+)
 
 def parse_message(message: Dict[str, Any]) -> Dict[str, Any]:
     """Parse an email message to detect TLScontact appointments"""
@@ -23,22 +69,20 @@ def parse_message(message: Dict[str, Any]) -> Dict[str, Any]:
         'isTls': False,
         'parsed': False,
         'date': None,
+        'dateObj': None,
         'dateRaw': None,
         'link': None,
         'from': message.get('from', ''),
         'subject': message.get('subject', ''),
         'snippet': message.get('snippet', ''),
-        'rawBody': message.get('body', '')
+        'rawBody': message.get('body', ''),
+        'isAppointment': False
     }
 
     # Check if email meets criteria
-    is_tls_domain = bool(TLS_DOMAIN_REGEX.search(result['from']))
-    
-    # Exact keywords logic from Node.js
-    text_to_search = f"{result['subject']} {result['snippet']} {result['rawBody']}"
-    has_keyword = bool(re.search(r'rendez-?vous|rdv|visa|tlscontact|tls-contact', text_to_search, re.IGNORECASE))
-
-    result['isTls'] = is_tls_domain or has_keyword
+    result['isTls'], result['isAppointment'] = scan_keywords(
+        result['from'], result['subject'], result['snippet'], result['rawBody']
+    )
 
     if not result['isTls']:
         logger.debug(f"Message not from TLScontact: {message.get('id')}")
@@ -47,13 +91,15 @@ def parse_message(message: Dict[str, Any]) -> Dict[str, Any]:
     labels = message.get('labelIds', [])
     logger.info(f"TLScontact email detected: {{'id': {message.get('id')}, 'subject': {result['subject']}, 'from': {result['from']}, 'labels': {', '.join(labels)}}}")
 
-    result['labels'] = labels
+    # Set of label ids for constant-time SPAM/TRASH checks
+    result['labels'] = frozenset(labels)
 
     # Extract date
     extracted = extract_date(result['rawBody'], result['subject'], result['snippet'])
     if extracted:
         result['parsed'] = True
         result['date'] = format_date_iso(extracted['date'])
+        result['dateObj'] = extracted['date']
         result['dateRaw'] = extracted['raw']
     else:
         logger.warning(f"Failed to extract date from message: {message.get('id')}")
@@ -63,28 +109,56 @@ def parse_message(message: Dict[str, Any]) -> Dict[str, Any]:
 
     return result
 
+def scan_keywords(sender: str, subject: str, snippet: str, body: str) -> Tuple[bool, bool]:
+    """Return (is TLS email, mentions an appointment) with one fused regex pass per field"""
+    is_tls = False
+    is_appointment = False
+
+    # Sender counts only for the domain check
+    for match in TLS_FUSED_REGEX.finditer(sender):
+        if match.lastgroup == 'dom':
+            is_tls = True
+            break
+
+    # Keywords in subject/snippet/body; appointment keywords only in subject and body
+    for text, checks_appointment in ((subject, True), (snippet, False), (body, True)):
+        if is_tls and (is_appointment or not checks_appointment):
+            continue
+        for match in TLS_FUSED_REGEX.finditer(text):
+            group = match.lastgroup
+            if group != 'appt':
+                is_tls = True
+            if checks_appointment and group in ('both', 'appt'):
+                is_appointment = True
+            if is_tls and (is_appointment or not checks_appointment):
+                break
+
+    return is_tls, is_appointment
+
 def extract_date(body: str, subject: str = '', snippet: str = '') -> Optional[Dict[str, Any]]:
-    """Extract appointment date from email body using numeric regex and dateparser"""
+    """Extract appointment date from email body using numeric regex, dateutil and dateparser"""
     combined_text = f"{subject}\n{snippet}\n{body}"
 
     # Try numeric date pattern first
     numeric_matches = DATE_NUMERIC_REGEX.findall(combined_text)
     for date_str in numeric_matches:
-        # dateparser handles multiple locales including French and English
-        parsed_dt = dateparser.parse(date_str, settings={'PREFER_DATES_FROM': 'future'})
+        # dateutil is much cheaper than dateparser for plain DD/MM/YYYY dates
+        try:
+            parsed_dt = dateutil_parser.parse(date_str, dayfirst=True, fuzzy=False)
+        except (ValueError, OverflowError):
+            # dateparser handles multiple locales including French and English
+            parsed_dt = DATE_PARSER.get_date_data(date_str).date_obj
         if parsed_dt:
             logger.debug(f"Extracted date (numeric): {date_str} -> {parsed_dt.isoformat()}")
             return {'date': parsed_dt, 'raw': date_str}
 
-    # Fallback to dateparser for natural language
-    # Iterate over lines to find potential date strings
-    # This mirrors the behavior of finding a date within the text more reliably
-    lines = combined_text.split('\n')
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
+    # Computed once for the year check on every natural-language candidate
+    current_year = datetime.now().year
+
+    # Fallback to dateparser for natural language, only on lines that can hold a date
+    for match in DATE_CANDIDATE_LINE_REGEX.finditer(combined_text):
+        line = match.group(0).strip()
+
         # Skip lines that are too short or just numbers
         if len(line) < 5 or line.isdigit():
             continue
@@ -93,19 +167,10 @@ def extract_date(body: str, subject: str = '', snippet: str = '') -> Optional[Di
         cleaned_line = line.lstrip('- ').replace('Date:', '').strip()
         
         # Try parsing the line
-        parsed_dt = dateparser.parse(
-            cleaned_line, 
-            languages=['en', 'fr'],
-            settings={
-                'PREFER_DATES_FROM': 'future',
-                'STRICT_PARSING': False, 
-                'REQUIRE_PARTS': ['day', 'month']
-            }
-        )
+        parsed_dt = DATE_PARSER.get_date_data(cleaned_line).date_obj
         
         if parsed_dt:
             # Simple valid year check (e.g. current year or next)
-            current_year = datetime.now().year
             if current_year - 1 <= parsed_dt.year <= current_year + 2:
                 logger.debug(f"Extracted date (natural): {line} -> {parsed_dt.isoformat()}")
                 return {'date': parsed_dt, 'raw': line}
@@ -117,38 +182,32 @@ def extract_link(body: str) -> Optional[str]:
     if not body:
         return None
 
-    try:
-        soup = BeautifulSoup(body, 'html.parser')
-        links = []
-
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if href.startswith('http'):
-                links.append(href)
-
-        # Prefer links containing "tlscontact" or "confirm"
-        for link in links:
-            if re.search(r'tlscontact|confirm', link, re.IGNORECASE):
-                logger.debug(f"Extracted link (TLS/confirm): {link}")
-                return link
+    # Anchor hrefs straight from the raw HTML, no DOM needed
+    links = []
+    for match in HREF_REGEX.finditer(body):
+        href = html.unescape(match.group(1).strip())
+        if href.startswith('http'):
+            links.append(href)
 
-        if links:
-            logger.debug(f"Extracted link (first): {links[0]}")
-            return links[0]
+    # Prefer links containing "tlscontact" or "confirm"
+    for link in links:
+        if TLS_LINK_REGEX.search(link):
+            logger.debug(f"Extracted link (TLS/confirm): {link}")
+            return link
 
-    except Exception:
-        logger.debug("Failed to parse HTML, trying plain text link extraction")
+    if links:
+        logger.debug(f"Extracted link (first): {links[0]}")
+        return links[0]
 
     # Fallback: extract URLs from plain text
-    url_regex = re.compile(r'https?://[^\s"<>|)]+', re.IGNORECASE)
-    matches = url_regex.findall(body)
+    matches = URL_REGEX.findall(body)
     
     if matches:
         # Remove trailing punctuation
-        cleaned_matches = [re.sub(r'[.!?,;:]+$', '', url) for url in matches]
+        cleaned_matches = [TRAILING_PUNCT_REGEX.sub('', url) for url in matches]
         
         for url in cleaned_matches:
-            if re.search(r'tlscontact|confirm', url, re.IGNORECASE):
+            if TLS_LINK_REGEX.search(url):
                 logger.debug(f"Extracted link (plain text TLS/confirm): {url}")
                 return url
         
@@ -160,8 +219,10 @@ def format_for_telegram(parsed: Dict[str, Any], message_id: str) -> str:
     """Format parsed result for Telegram notification"""
     header = '🔔 <b>TLScontact Update</b>'
 
-    # Check for keywords for Emergency alert
-    is_appointment = bool(re.search(r'rendez-?vous|rdv|appointment', f"{parsed['subject']} {parsed['rawBody']}", re.IGNORECASE))
+    # Check for keywords for Emergency alert (already scanned by parse_message)
+    is_appointment = parsed.get('isAppointment')
+    if is_appointment is None:
+        is_appointment = bool(APPOINTMENT_REGEX.search(parsed['subject']) or APPOINTMENT_REGEX.search(parsed['rawBody']))
 
     if is_appointment and parsed['parsed']:
         header = '🚨 <b>EMERGENCY: APPOINTMENT FOUND</b>'
@@ -177,7 +238,8 @@ def format_for_telegram(parsed: Dict[str, Any], message_id: str) -> str:
 
     if parsed['parsed'] and parsed['date']:
         try:
-            date_obj = datetime.fromisoformat(parsed['date'].replace('Z', '+00:00'))
+            # Parsed results carry the datetime; older dicts only have the ISO string
+            date_obj = parsed.get('dateObj') or datetime.fromisoformat(parsed['date'].replace('Z', '+00:00'))
             # Format: weekday, day month year, hour:minute (French-like)
             # Python's locale-dependent formatting can be tricky, using a manual format for "pretty"
             pretty_date = date_obj.strftime('%A %d %B %Y %H:%M') 
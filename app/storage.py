@@ -1,24 +1,35 @@
 import sqlite3
 import os
 import time
-from typing import Optional, List
+import threading
+from typing import Optional, List, Set
 from .utils import logger
 
 class SqliteStorage:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._conn = None
+        # The connection and _seen are shared by every thread that polls (the /poll
+        # endpoint and the continuous poller can write at the same time)
+        self._lock = threading.Lock()
         self._init_db()
+        self._seen: Set[str] = self._load_seen()
         logger.info(f"Using SQLite storage: {db_path}")
 
     def _get_conn(self):
         if self._conn is None:
-            self._conn = sqlite3.connect(self.db_path)
+            # Used from asyncio.to_thread workers; access is serialised by self._lock
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
         return self._conn
 
     def _init_db(self):
         conn = self._get_conn()
         cursor = conn.cursor()
+        # WAL + NORMAL sync: commits no longer fsync the main db file each time
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS processed_messages (
                 message_id TEXT PRIMARY KEY,
@@ -31,35 +42,64 @@ class SqliteStorage:
         """)
         conn.commit()
 
+    def _load_seen(self) -> Set[str]:
+        cursor = self._get_conn().cursor()
+        cursor.execute("SELECT message_id FROM processed_messages")
+        return {row[0] for row in cursor.fetchall()}
+
     def has_processed(self, message_id: str) -> bool:
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1 FROM processed_messages WHERE message_id = ?", (message_id,))
-        return cursor.fetchone() is not None
+        # Answered from memory; _seen mirrors every row of the table
+        with self._lock:
+            return message_id in self._seen
+
+    def unprocessed(self, message_ids: List[str]) -> List[str]:
+        with self._lock:
+            seen = self._seen
+            return [message_id for message_id in message_ids if message_id not in seen]
 
     def mark_processed(self, message_id: str):
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR IGNORE INTO processed_messages (message_id, processed_at) VALUES (?, ?)",
-            (message_id, int(time.time() * 1000))
-        )
-        conn.commit()
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT OR IGNORE INTO processed_messages (message_id, processed_at) VALUES (?, ?)",
+                (message_id, int(time.time() * 1000))
+            )
+            conn.commit()
+            self._seen.add(message_id)
         logger.debug(f"Marked as processed (SQLite): {message_id}")
 
+    def mark_processed_many(self, message_ids: List[str]):
+        if not message_ids:
+            return
+        now = int(time.time() * 1000)
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.cursor()
+            cursor.executemany(
+                "INSERT OR IGNORE INTO processed_messages (message_id, processed_at) VALUES (?, ?)",
+                [(message_id, now) for message_id in message_ids]
+            )
+            conn.commit()
+            self._seen.update(message_ids)
+        logger.debug(f"Marked {len(message_ids)} messages as processed (SQLite)")
+
     def cleanup(self, older_than_days: int = 30):
         cutoff = int((time.time() - (older_than_days * 24 * 60 * 60)) * 1000)
-        conn = self._get_conn()
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM processed_messages WHERE processed_at < ?", (cutoff,))
-        changes = conn.total_changes
-        conn.commit()
+        with self._lock:
+            conn = self._get_conn()
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM processed_messages WHERE processed_at < ?", (cutoff,))
+            changes = conn.total_changes
+            conn.commit()
+            self._seen = self._load_seen()
         logger.info(f"Cleaned up {changes} old entries")
 
     def close(self):
-        if self._conn:
-            self._conn.close()
-            self._conn = None
+        with self._lock:
+            if self._conn:
+                self._conn.close()
+                self._conn = None
 
 storage_impl: Optional[SqliteStorage] = None
 
@@ -81,11 +121,21 @@ def has_processed(message_id: str) -> bool:
         raise RuntimeError("Storage not initialized. Call init_storage() first.")
     return storage_impl.has_processed(message_id)
 
+def unprocessed(message_ids: List[str]) -> List[str]:
+    if not storage_impl:
+        raise RuntimeError("Storage not initialized. Call init_storage() first.")
+    return storage_impl.unprocessed(message_ids)
+
 def mark_processed(message_id: str):
     if not storage_impl:
         raise RuntimeError("Storage not initialized. Call init_storage() first.")
     storage_impl.mark_processed(message_id)
 
+def mark_processed_many(message_ids: List[str]):
+    if not storage_impl:
+        raise RuntimeError("Storage not initialized. Call init_storage() first.")
+    storage_impl.mark_processed_many(message_ids)
+
 def cleanup(older_than_days: int = 30):
     if storage_impl:
         storage_impl.cleanup(older_than_days)
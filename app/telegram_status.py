@@ -0,0 +1,287 @@
+"""
+telegram_status.py
+
+Async /test handler (python-telegram-bot v20+)
+
+Checks:
+- PROJECT_URL (HTTP)
+- or PROJECT_HOST + PROJECT_PORT (TCP)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+import socket
+import asyncio
+import functools
+from typing import TYPE_CHECKING, Tuple, Optional
+from importlib import import_module
+
+# aiohttp and telegram are imported where they are used, so importing this
+# module (e.g. during test collection) does not pay for them
+if TYPE_CHECKING:
+    import aiohttp
+    from telegram import Update
+    from telegram.ext import Application, ContextTypes
+
+# --- Load .env safely (once per process) ---
+if not os.environ.get("_DOTENV_LOADED"):
+    try:
+        from dotenv import load_dotenv
+        # The repo layout is fixed, so skip find_dotenv's directory walk
+        dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
+        if os.path.exists(dotenv_path):
+            load_dotenv(dotenv_path)
+    except Exception:
+        pass
+    os.environ["_DOTENV_LOADED"] = "1"
+
+
+# --- Config helpers ---
+# Config modules that failed to import, so they are not retried
+_MISSING_MODULES: set[str] = set()
+
+
+def cached_import(module_name: str):
+    modules = sys.modules
+    return modules[module_name] if module_name in modules else import_module(module_name)
+
+
+def get_config(name: str, modules: tuple[str, ...]) -> Optional[str]:
+    # Environment is read on every call so runtime overrides still win
+    if os.getenv(name):
+        return os.getenv(name)
+
+    return _get_module_config(name, tuple(modules))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_module_config(name: str, modules: tuple[str, ...]) -> Optional[str]:
+    for module_name in modules:
+        if module_name in _MISSING_MODULES:
+            continue
+        try:
+            mod = cached_import(module_name)
+        except Exception:
+            _MISSING_MODULES.add(module_name)
+            continue
+
+        if hasattr(mod, name):
+            return getattr(mod, name)
+
+        if hasattr(mod, name.lower()):
+            return getattr(mod, name.lower())
+
+        if hasattr(mod, "CONFIG") and isinstance(mod.CONFIG, dict):
+            return mod.CONFIG.get(name) or mod.CONFIG.get(name.lower())
+
+    return None
+
+
+COMMON_CONFIG_MODULES = (
+    "config",
+    "settings",
+    "app.config",
+    "app.settings",
+)
+
+# --- Defaults ---
+FALLBACK_URL = "https://tlscontact-visa-watcher-py-production-a1a8.up.railway.app/"
+CHECK_TIMEOUT = int(os.getenv("CHECK_TIMEOUT", "5"))
+# Connect phase gets its own tighter bound within the total
+CONNECT_TIMEOUT = min(CHECK_TIMEOUT, 3)
+# The probe target is fixed, so its DNS answer is kept for a while
+DNS_CACHE_TTL = 300
+
+def _coerce_int(value, default: int = 0) -> int:
+    try:
+        return int(value) if value else default
+    except (TypeError, ValueError):
+        return default
+
+
+# --- Resolve target ---
+# get_config checks the environment first, so it is the only lookup needed
+PROJECT_URL = get_config("PROJECT_URL", COMMON_CONFIG_MODULES) or FALLBACK_URL
+PROJECT_HOST = get_config("PROJECT_HOST", COMMON_CONFIG_MODULES)
+PROJECT_PORT = _coerce_int(get_config("PROJECT_PORT", COMMON_CONFIG_MODULES))
+
+
+# --- Networking ---
+# --- Shared HTTP session ---
+_session: Optional[aiohttp.ClientSession] = None
+_session_lock = asyncio.Lock()
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared session, creating it on first use."""
+    global _session
+    import aiohttp
+
+    async with _session_lock:
+        if _session is None or _session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=10,
+                enable_cleanup_closed=True,
+                use_dns_cache=True,
+                ttl_dns_cache=DNS_CACHE_TTL,
+            )
+            _session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=CHECK_TIMEOUT, connect=CONNECT_TIMEOUT),
+            )
+    return _session
+
+
+async def close_session() -> None:
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def check_http(url: str) -> Tuple[bool, str]:
+    start = time.monotonic()
+
+    try:
+        session = await get_session()
+        async with session.get(url, allow_redirects=True) as resp:
+            elapsed = int((time.monotonic() - start) * 1000)
+            ok = 200 <= resp.status < 400
+            return ok, f"HTTP {resp.status} — {elapsed}ms"
+    except Exception as e:
+        elapsed = int((time.monotonic() - start) * 1000)
+        return False, f"HTTP error: {e} — {elapsed}ms"
+
+
+# (host, port) -> (resolved at, sockaddrs)
+_resolved: dict[tuple[str, int], tuple[float, list[tuple[str, int]]]] = {}
+
+
+async def resolve(host: str, port: int) -> list[tuple[str, int]]:
+    """Return every TCP address for host:port, cached for DNS_CACHE_TTL."""
+    key = (host, port)
+    now = time.monotonic()
+    cached = _resolved.get(key)
+    if cached is not None and now - cached[0] < DNS_CACHE_TTL:
+        return cached[1]
+
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    addrs = list(dict.fromkeys(info[4][:2] for info in infos))
+    _resolved[key] = (now, addrs)
+    return addrs
+
+
+async def _connect_any(host: str, port: int) -> None:
+    # Like open_connection, try each resolved address until one accepts
+    loop = asyncio.get_running_loop()
+    last_error: Optional[Exception] = None
+    for addr_host, addr_port in await resolve(host, port):
+        try:
+            # A bare transport is enough to prove reachability; abort() drops it at once
+            transport, _ = await loop.create_connection(asyncio.Protocol, addr_host, addr_port)
+        except OSError as e:
+            last_error = e
+            continue
+        transport.abort()
+        return
+    raise last_error or OSError(f"No addresses found for {host}:{port}")
+
+
+async def check_tcp(host: str, port: int) -> Tuple[bool, str]:
+    start = time.monotonic()
+    try:
+        await asyncio.wait_for(_connect_any(host, port), timeout=CHECK_TIMEOUT)
+        elapsed = int((time.monotonic() - start) * 1000)
+        return True, f"TCP {host}:{port} reachable — {elapsed}ms"
+    except Exception as e:
+        # Re-resolve next time rather than keep probing addresses that failed
+        _resolved.pop((host, port), None)
+        elapsed = int((time.monotonic() - start) * 1000)
+        return False, f"TCP error: {e} — {elapsed}ms"
+
+
+# --- Single-flight result cache ---
+# Concurrent /test calls share one probe, and its result is reused briefly
+RESULT_TTL = 2.0
+_result_cache: Optional[Tuple[float, Tuple[bool, str]]] = None
+_inflight: Optional[asyncio.Future] = None
+
+
+def _finish_probe(task: asyncio.Future) -> None:
+    global _inflight, _result_cache
+    _inflight = None
+    if not task.cancelled() and task.exception() is None:
+        _result_cache = (time.monotonic(), task.result())
+
+
+async def do_check() -> Tuple[bool, str]:
+    global _inflight
+    if _result_cache is not None and time.monotonic() - _result_cache[0] < RESULT_TTL:
+        return _result_cache[1]
+
+    if _inflight is None:
+        _inflight = asyncio.ensure_future(_probe())
+        _inflight.add_done_callback(_finish_probe)
+
+    # Shielded so one cancelled caller does not cancel the probe for the others
+    return await asyncio.shield(_inflight)
+
+
+async def _probe() -> Tuple[bool, str]:
+    if PROJECT_URL:
+        return await check_http(PROJECT_URL)
+
+    if PROJECT_HOST and PROJECT_PORT:
+        return await check_tcp(PROJECT_HOST, PROJECT_PORT)
+
+    return False, "No target configured (PROJECT_URL or PROJECT_HOST + PROJECT_PORT)."
+
+
+# --- Telegram handlers ---
+TEST_TEXT_REGEX = re.compile(r"^\s*test\s*$", re.IGNORECASE)
+
+
+# Only probes slower than this get a "checking" message that is edited afterwards
+PROGRESS_DELAY = 1.0
+
+
+def format_status(ok: bool, info: str) -> str:
+    status = "ONLINE ✅" if ok else "OFFLINE ❌"
+    return f"Project status: {status}\n{info}"
+
+
+async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    message = update.effective_message
+    check = asyncio.ensure_future(do_check())
+    done, _ = await asyncio.wait({check}, timeout=PROGRESS_DELAY)
+    if done:
+        await message.reply_text(format_status(*check.result()))
+        return
+
+    msg = await message.reply_text("🔍 Checking project status...")
+    await msg.edit_text(format_status(*await check))
+
+
+def register_handlers(application: Application) -> None:
+    from telegram.ext import CommandHandler, MessageHandler, filters
+
+    application.add_handler(CommandHandler("test", test_command))
+    # Plain "test" messages are matched by the filter, so other text never reaches a handler
+    application.add_handler(
+        MessageHandler(filters.TEXT & ~filters.COMMAND & filters.Regex(TEST_TEXT_REGEX), test_command)
+    )
+
+    # Close the shared HTTP session when the application stops
+    previous_post_shutdown = application.post_shutdown
+
+    async def post_shutdown(app: Application) -> None:
+        if previous_post_shutdown:
+            await previous_post_shutdown(app)
+        await close_session()
+
+    application.post_shutdown = post_shutdown
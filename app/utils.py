@@ -1,7 +1,9 @@
 import os
+import re
 import asyncio
 import time
 import logging
+import httpx
 from datetime import datetime
 from typing import Callable, Any, Optional
 
@@ -25,6 +27,18 @@ logging.basicConfig(
 
 logger = logging.getLogger('tlscontact-gmail-watcher')
 
+# Shared connection pool settings for long-lived API clients
+HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0)
+
+def create_http_client(base_url: str, timeout: float = 10.0) -> httpx.AsyncClient:
+    """Create a pooled HTTP/2 client for a single API host"""
+    return httpx.AsyncClient(
+        base_url=base_url,
+        http2=True,
+        limits=HTTP_LIMITS,
+        timeout=httpx.Timeout(timeout, connect=3.0)
+    )
+
 async def sleep(ms: int):
     """Sleep utility"""
     await asyncio.sleep(ms / 1000)
@@ -58,60 +72,66 @@ async def retry_with_backoff(
 
     raise last_error
 
+# Common transient error keywords for httpx and other libraries, matched in one pass
+TRANSIENT_ERROR_REGEX = re.compile(
+    r'timeout|network|connection reset|socket hang up|econnrefused|enotfound|etimedout|econnreset',
+    re.IGNORECASE
+)
+TRANSIENT_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
 def is_transient_error(error: Exception) -> bool:
     """Check if error is transient (network, timeout, rate limit)"""
     if not error:
         return False
     
-    msg = str(error).lower()
-    
-    # Common transient error keywords for httpx and other libraries
-    transient_keywords = [
-        'timeout', 'network', 'connection reset', 'socket hang up',
-        'econnrefused', 'enotfound', 'etimedout', 'econnreset'
-    ]
-    
-    if any(keyword in msg for keyword in transient_keywords):
+    if TRANSIENT_ERROR_REGEX.search(str(error)):
         return True
 
     # Check for HTTP status codes if it's an HTTP error (e.g., from httpx)
     if hasattr(error, 'response') and hasattr(error.response, 'status_code'):
-        status = error.response.status_code
-        if status in [429, 500, 502, 503, 504]:
+        if error.response.status_code in TRANSIENT_STATUS_CODES:
             return True
 
     return False
 
+# Fixed-point scale for RateLimiter: one token is stored as 1e9 units
+TOKEN_SCALE = 1_000_000_000
+
 class RateLimiter:
-    """Rate limiter using token bucket algorithm"""
+    """Rate limiter using token bucket algorithm (integer nanosecond arithmetic)"""
     def __init__(self, max_tokens: float, refill_rate: float):
         self.max_tokens = max_tokens
-        self.tokens = max_tokens
         self.refill_rate = refill_rate  # tokens per second
-        self.last_refill = time.time()
+        self._max_units = int(max_tokens * TOKEN_SCALE)
+        self._units = self._max_units
+        self._refill_units_per_sec = int(refill_rate * TOKEN_SCALE)
+        self._last_ns = time.monotonic_ns()
+
+    @property
+    def tokens(self) -> float:
+        return self._units / TOKEN_SCALE
 
     async def acquire(self, tokens: float = 1):
+        needed = int(tokens * TOKEN_SCALE)
         self._refill()
 
-        if self.tokens >= tokens:
-            self.tokens -= tokens
+        if self._units >= needed:
+            self._units -= needed
             return
 
         # Wait until we have enough tokens
-        tokens_needed = tokens - self.tokens
-        wait_time = tokens_needed / self.refill_rate
-        
+        wait_time = (needed - self._units) / self._refill_units_per_sec
+
         await asyncio.sleep(wait_time)
         self._refill()
-        self.tokens -= tokens
+        self._units -= needed
 
     def _refill(self):
-        now = time.time()
-        elapsed = now - self.last_refill
-        tokens_to_add = elapsed * self.refill_rate
-        
-        self.tokens = min(self.max_tokens, self.tokens + tokens_to_add)
-        self.last_refill = now
+        now = time.monotonic_ns()
+        added = (now - self._last_ns) * self._refill_units_per_sec // 1_000_000_000
+
+        self._units = min(self._max_units, self._units + added)
+        self._last_ns = now
 
 def format_date_iso(dt: Optional[datetime]) -> Optional[str]:
     """Format datetime to ISO 8601 string"""
@@ -119,13 +139,16 @@ def format_date_iso(dt: Optional[datetime]) -> Optional[str]:
         return None
     return dt.isoformat()
 
+# Single-pass translation table for escape_html
+HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;',
+    '<': '&lt;',
+    '>': '&gt;',
+    '"': '&quot;'
+})
+
 def escape_html(text: str) -> str:
     """Sanitize HTML for Telegram HTML mode"""
     if not text:
         return ''
-    return (
-        text.replace('&', '&amp;')
-            .replace('<', '&lt;')
-            .replace('>', '&gt;')
-            .replace('"', '&quot;')
-    )
+    return text.translate(HTML_ESCAPE_TABLE)
@@ -2,10 +2,10 @@ import os
 import asyncio
 from typing import Dict, Any, List
 from .utils import logger
-from .gmail_client import init_gmail_client, list_messages, get_message
+from .gmail_client import init_gmail_client, list_and_fetch
 from .parser import parse_message
 from .notifier import init_telegram_client, send_appointment_notification
-from .storage import init_storage, has_processed, mark_processed
+from .storage import init_storage, unprocessed, mark_processed_many
 
 async def run_poll_cycle() -> Dict[str, Any]:
     """Run one polling cycle"""
@@ -47,71 +47,82 @@ async def run_poll_cycle() -> Dict[str, Any]:
 
         logger.info(f"Poll config: {{'query': {query}, 'limit': {limit}, 'maxSends': {max_sends}, 'searchAnywhere': {search_anywhere}}}")
 
-        # List messages
-        messages = await list_messages(query, limit, search_anywhere)
+        # Skip already processed messages before fetching anything
+        new_ids: List[str] = []
+
+        def select_new(ids: List[str]) -> List[str]:
+            new_ids.extend(unprocessed(ids))
+            return new_ids
+
+        # List messages and batch-fetch the new ones
+        messages, full_messages = await list_and_fetch(query, limit, search_anywhere, select_new)
         stats['checked'] = len(messages)
+        stats['new'] = len(new_ids)
+        stats['processed'] = len(messages) - len(new_ids)
 
         if not messages:
             logger.info('No messages found matching query')
             return stats
 
-        logger.info(f"Found {len(messages)} messages, processing...")
+        logger.info(f"Found {len(messages)} messages, {len(new_ids)} new, processing...")
 
         sent_count = 0
 
-        # Process each message
-        for msg in messages:
-            message_id = msg['id']
-            try:
-                # Check if already processed
-                if has_processed(message_id):
-                    logger.debug(f"Message already processed, skipping: {message_id}")
-                    stats['processed'] += 1
-                    continue
-
-                stats['new'] += 1
-
-                # Fetch full message
-                full_message = await get_message(message_id)
-
-                # Log labels
-                labels = full_message.get('labelIds', [])
-                logger.info(f"Processing message {message_id} found in: {', '.join(labels)}")
-
-                # Parse message
-                parsed = parse_message(full_message)
-
-                # Check if this is a TLScontact email
-                if not parsed.get('isTls'):
-                    logger.debug(f"Message not TLScontact, marking processed: {message_id}")
-                    mark_processed(message_id)
-                    continue
-
-                # Check send limit
-                if sent_count >= max_sends:
-                    logger.warning(f"Reached max sends limit ({max_sends}), skipping notification for: {message_id}")
-                    mark_processed(message_id)
-                    continue
-
-                # Send notification
-                logger.info(f"Sending notification for message: {message_id}")
-                await send_appointment_notification(parsed, message_id)
-
-                sent_count += 1
-                stats['notified'] += 1
-
-                # Mark as processed AFTER successful notification
-                mark_processed(message_id)
-
-                logger.info(f"Message processed successfully: {message_id}")
-
-            except Exception as e:
-                logger.error(f"Failed to process message {message_id}: {str(e)}")
+        fetched_ids = {m['id'] for m in full_messages}
+        for message_id in new_ids:
+            if message_id not in fetched_ids:
                 stats['errors'].append({
                     'messageId': message_id,
-                    'error': str(e)
+                    'error': 'Message missing from batch response'
                 })
 
+        # Process each message, recording processed ids to flush in one write
+        processed_ids = []
+        try:
+            for full_message in full_messages:
+                message_id = full_message['id']
+                try:
+                    # Log labels
+                    labels = full_message.get('labelIds', [])
+                    logger.info(f"Processing message {message_id} found in: {', '.join(labels)}")
+
+                    # Parse message
+                    parsed = parse_message(full_message)
+
+                    # Check if this is a TLScontact email
+                    if not parsed.get('isTls'):
+                        logger.debug(f"Message not TLScontact, marking processed: {message_id}")
+                        processed_ids.append(message_id)
+                        continue
+
+                    # Check send limit
+                    if sent_count >= max_sends:
+                        logger.warning(f"Reached max sends limit ({max_sends}), skipping notification for: {message_id}")
+                        processed_ids.append(message_id)
+                        continue
+
+                    # Send notification
+                    logger.info(f"Sending notification for message: {message_id}")
+                    await send_appointment_notification(parsed, message_id)
+
+                    sent_count += 1
+                    stats['notified'] += 1
+
+                    # Mark as processed AFTER successful notification
+                    processed_ids.append(message_id)
+
+                    logger.info(f"Message processed successfully: {message_id}")
+
+                except Exception as e:
+                    logger.error(f"Failed to process message {message_id}: {str(e)}")
+                    stats['errors'].append({
+                        'messageId': message_id,
+                        'error': str(e)
+                    })
+        finally:
+            # Commit in a worker thread so the fsync doesn't stall the event loop
+            await asyncio.to_thread(mark_processed_many, processed_ids)
+
         logger.info(f"=== Poll cycle complete === {stats}")
         return stats
 
@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.watcher import run_poll_cycle
 from app.storage import close_storage
+from app.notifier import close_telegram_client
+from app.gmail_client import close_gmail_client
 from app.utils import logger
 
 async def main():
@@ -23,6 +25,8 @@ async def main():
 
         # Close storage connection
         close_storage()
+        await close_telegram_client()
+        await close_gmail_client()
 
         # Exit with success
         sys.exit(0)
@@ -32,6 +36,8 @@ async def main():
 
         # Close storage connection
         close_storage()
+        await close_telegram_client()
+        await close_gmail_client()
 
         # Exit with error code
         sys.exit(1)
@@ -1,8 +1,14 @@
 import os
-import httpx
+import sys
 import asyncio
 from dotenv import load_dotenv
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import create_http_client
+from app.notifier import TELEGRAM_API_BASE
+
 async def setup_webhook():
     """Set up Telegram webhook to point to Railway deployment"""
     load_dotenv()
@@ -26,11 +32,11 @@ async def setup_webhook():
     
     print(f"\n🔧 Setting webhook to: {webhook_url}")
     
-    async with httpx.AsyncClient() as client:
+    # One pooled HTTP/2 client for both calls, same settings as the app's Telegram client
+    async with create_http_client(TELEGRAM_API_BASE) as client:
         try:
             # Set webhook
-            url = f"https://api.telegram.org/bot{bot_token}/setWebhook"
-            response = await client.post(url, json={'url': webhook_url}, timeout=10.0)
+            response = await client.post(f"/bot{bot_token}/setWebhook", json={'url': webhook_url})
             response.raise_for_status()
             result = response.json()
             
@@ -39,8 +45,7 @@ async def setup_webhook():
                 print(f"   Description: {result.get('description', 'N/A')}")
                 
                 # Get webhook info to confirm
-                info_url = f"https://api.telegram.org/bot{bot_token}/getWebhookInfo"
-                info_response = await client.get(info_url, timeout=10.0)
+                info_response = await client.get(f"/bot{bot_token}/getWebhookInfo")
                 info_result = info_response.json()
                 
                 if info_result.get('ok'):
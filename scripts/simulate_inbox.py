@@ -7,6 +7,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.parser import parse_message, format_for_telegram
 
+# Telegram HTML to console plain text, applied in order
+PLAIN_TEXT_SUBS = [
+    (re.compile(r'<b>(.*?)</b>'), r'**\1**'),
+    (re.compile(r'<code>(.*?)</code>'), r'`\1`'),
+    (re.compile(r'<a href="(.*?)">(.*?)</a>'), r'\2 (\1)'),
+    (re.compile(r'<[^>]+>'), ''),
+]
+
 FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tests', 'fixtures')
 
 def load_fixture(filename):
@@ -105,10 +113,9 @@ async def main():
             print('-'*60)
             telegram_msg = format_for_telegram(parsed, message['id'])
             # Strip HTML tags for console display
-            plain_msg = re.sub(r'<b>(.*?)</b>', r'**\1**', telegram_msg)
-            plain_msg = re.sub(r'<code>(.*?)</code>', r'`\1`', plain_msg)
-            plain_msg = re.sub(r'<a href="(.*?)">(.*?)</a>', r'\2 (\1)', plain_msg)
-            plain_msg = re.sub(r'<[^>]+>', '', plain_msg)
+            plain_msg = telegram_msg
+            for pattern, replacement in PLAIN_TEXT_SUBS:
+                plain_msg = pattern.sub(replacement, plain_msg)
             print(plain_msg)
             print('-'*60)
 
@@ -6,15 +6,20 @@ from dotenv import load_dotenv
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.notifier import init_telegram_client, test_connection
+from app.notifier import init_telegram_client, close_telegram_client, test_connection
+
+async def run_once() -> bool:
+    """Send one test message; the HTTP client stays open so callers looping in
+    their own event loop reuse the pooled connection between runs"""
+    init_telegram_client()
+    return await test_connection()
 
 async def main():
     load_dotenv()
-    
+
     print("Testing Telegram connection...")
     try:
-        init_telegram_client()
-        result = await test_connection()
+        result = await run_once()
         if result:
             print("\n[SUCCESS] Successfully sent test message! Check your Telegram chat.")
         else:
@@ -24,6 +29,8 @@ async def main():
         print(f"\n[ERROR] Error: {e}")
         print("Make sure TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID are set in your .env file.")
         sys.exit(1)
+    finally:
+        await close_telegram_client()
 
 if __name__ == "__main__":
     asyncio.run(main())
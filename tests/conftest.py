@@ -0,0 +1,5 @@
+import sys
+import pathlib
+
+# Make the app package importable from every test module
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
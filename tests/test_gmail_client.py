@@ -0,0 +1,249 @@
+import json
+import base64
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+
+from app import gmail_client
+from app.gmail_client import build_batch_body, parse_batch_response, parse_gmail_message
+
+def make_batch_response(boundary, items, content_ids=None):
+    parts = []
+    for i, (status, reason, body) in enumerate(items):
+        content_id = content_ids[i] if content_ids else f"item{i}"
+        parts.append(
+            f"--{boundary}\r\n"
+            f"Content-Type: application/http\r\n"
+            f"Content-ID: <response-{content_id}>\r\n"
+            f"\r\n"
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json; charset=UTF-8\r\n"
+            f"\r\n"
+            f"{json.dumps(body)}\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n")
+    return ''.join(parts)
+
+def test_build_batch_body():
+    body = build_batch_body(['abc', 'def'], 'me', 'batch_test')
+
+    assert body.count('--batch_test\r\n') == 2
+    assert body.endswith('--batch_test--\r\n')
+    assert 'GET /gmail/v1/users/me/messages/abc?format=full' in body
+    assert 'GET /gmail/v1/users/me/messages/def?format=full' in body
+
+def test_parse_batch_response():
+    text = make_batch_response('batch_xyz', [
+        (200, 'OK', {'id': 'abc', 'threadId': 't1'}),
+        (404, 'Not Found', {'error': {'code': 404}}),
+    ])
+    results = parse_batch_response(text, 'multipart/mixed; boundary=batch_xyz')
+
+    assert len(results) == 2
+    assert results[0] == (200, {'id': 'abc', 'threadId': 't1'}, 'item0')
+    assert results[1][0] == 404
+    assert results[1][2] == 'item1'
+
+def test_parse_gmail_message_from_batch():
+    text = make_batch_response('batch_xyz', [
+        (200, 'OK', {
+            'id': 'abc',
+            'threadId': 't1',
+            'labelIds': ['INBOX'],
+            'snippet': 'Hello',
+            'payload': {
+                'headers': [
+                    {'name': 'Subject', 'value': 'Rendez-vous'},
+                    {'name': 'From', 'value': 'noreply@tlscontact.com'},
+                ],
+                'body': {'data': 'SGVsbG8gd29ybGQ'}
+            }
+        }),
+    ])
+    (status, message, _), = parse_batch_response(text, 'multipart/mixed; boundary="batch_xyz"')
+    parsed = parse_gmail_message(message)
+
+    assert status == 200
+    assert parsed['subject'] == 'Rendez-vous'
+    assert parsed['from'] == 'noreply@tlscontact.com'
+    assert parsed['body'] == 'Hello world'
+
+class FakeCredentials:
+    def __init__(self, token, expiry):
+        self.token = token
+        self.expiry = expiry
+        self.refresh_calls = 0
+
+    @property
+    def valid(self):
+        return self.token is not None and self.expiry > datetime.utcnow()
+
+    def refresh(self, request):
+        self.refresh_calls += 1
+        self.token = f"token-{self.refresh_calls}"
+        self.expiry = datetime.utcnow() + timedelta(hours=1)
+
+def test_get_valid_token_refreshes_missing_token(monkeypatch):
+    creds = FakeCredentials(None, datetime.utcnow())
+    monkeypatch.setattr(gmail_client, 'gmail_creds', creds)
+
+    token = asyncio.run(gmail_client.get_valid_token())
+
+    assert token == 'token-1'
+    assert creds.refresh_calls == 1
+
+def test_get_valid_token_serves_stale_token_while_refreshing(monkeypatch):
+    creds = FakeCredentials('old', datetime.utcnow() + timedelta(minutes=2))
+    monkeypatch.setattr(gmail_client, 'gmail_creds', creds)
+
+    async def run():
+        token = await gmail_client.get_valid_token()
+        await gmail_client._refresh_task
+        return token
+
+    assert asyncio.run(run()) == 'old'
+    assert creds.token == 'token-1'
+
+def test_decode_base64url_padding():
+    assert gmail_client.decode_base64url('SGVsbG8') == 'Hello'
+    assert gmail_client.decode_base64url('SGVsbG8h') == 'Hello!'
+    assert gmail_client.decode_base64url(b'SGk') == 'Hi'
+    assert gmail_client.decode_base64url('') == ''
+
+def test_extract_body_nested_parts_order():
+    def part(mime_type, text, children=None):
+        encoded = base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+        p = {'mimeType': mime_type, 'body': {'data': encoded}}
+        if children:
+            p['parts'] = children
+        return p
+
+    payload = {
+        'parts': [
+            {'mimeType': 'multipart/alternative', 'parts': [
+                part('text/plain', 'plain one'),
+                part('text/html', '<p>one</p>'),
+            ]},
+            part('text/html', '<p>two</p>'),
+        ]
+    }
+
+    assert gmail_client.extract_body(payload) == '<p>one</p>\n<hr>\n<p>two</p>'
+
+def test_decode_base64url_invalid_utf8():
+    encoded = base64.urlsafe_b64encode(b'caf\xe9').decode().rstrip('=')
+    assert gmail_client.decode_base64url(encoded) == 'caf�'
+
+async def fake_token():
+    return 'token'
+
+def test_init_after_close_recreates_http_client(monkeypatch):
+    import httpx
+
+    monkeypatch.setenv('GOOGLE_CLIENT_ID', 'client')
+    monkeypatch.setenv('GOOGLE_CLIENT_SECRET', 'secret')
+    monkeypatch.setenv('GOOGLE_REFRESH_TOKEN', 'refresh')
+    monkeypatch.setenv('GOOGLE_USER_EMAIL', 'me')
+    monkeypatch.setattr(gmail_client, 'gmail_creds', None)
+    monkeypatch.setattr(gmail_client, 'http_client', None)
+    monkeypatch.setattr(gmail_client, 'get_valid_token', fake_token)
+
+    def handler(request):
+        return httpx.Response(200, json={'messages': [{'id': 'abc', 'threadId': 't1'}]})
+
+    monkeypatch.setattr(gmail_client, 'create_http_client', lambda base_url, timeout=10.0: httpx.AsyncClient(
+        base_url=base_url, transport=httpx.MockTransport(handler)
+    ))
+
+    async def run():
+        gmail_client.init_gmail_client()
+        await gmail_client.close_gmail_client()
+        gmail_client.init_gmail_client()
+        try:
+            return await gmail_client.list_messages('from:tlscontact.com')
+        finally:
+            await gmail_client.close_gmail_client()
+
+    assert asyncio.run(run()) == [{'id': 'abc', 'threadId': 't1'}]
+
+def gmail_message(message_id):
+    return {'id': message_id, 'threadId': f"t-{message_id}", 'payload': {'headers': []}}
+
+def use_mock_gmail(monkeypatch, handler):
+    import httpx
+
+    monkeypatch.setattr(gmail_client, 'user_email', 'me')
+    monkeypatch.setattr(gmail_client, 'get_valid_token', fake_token)
+    monkeypatch.setattr(gmail_client, 'http_client', httpx.AsyncClient(
+        base_url=gmail_client.GMAIL_API_BASE, transport=httpx.MockTransport(handler)
+    ))
+
+def gmail_handler(batch_status=200, failing_parts=None, individual_calls=None):
+    import re
+    import httpx
+
+    def handler(request):
+        if request.url.path == gmail_client.GMAIL_BATCH_PATH:
+            if batch_status != 200:
+                return httpx.Response(batch_status)
+            ids = re.findall(r'/messages/([^?]+)\?format=full', request.content.decode())
+            failing = failing_parts or {}
+            items = [
+                (failing[message_id], 'Error', {'error': {'code': failing[message_id]}}) if message_id in failing
+                else (200, 'OK', gmail_message(message_id))
+                for message_id in ids
+            ]
+            return httpx.Response(
+                200,
+                text=make_batch_response('batch_resp', items, ids),
+                headers={'Content-Type': 'multipart/mixed; boundary=batch_resp'}
+            )
+        if request.url.path == '/gmail/v1/users/me/messages':
+            return httpx.Response(200, json={'messages': [{'id': 'a'}, {'id': 'b'}, {'id': 'c'}]})
+
+        message_id = request.url.path.rsplit('/', 1)[1]
+        if individual_calls is not None:
+            individual_calls.append(message_id)
+        return httpx.Response(200, json=gmail_message(message_id))
+
+    return handler
+
+def test_get_messages_bulk_refetches_transient_batch_parts(monkeypatch):
+    calls = []
+    use_mock_gmail(monkeypatch, gmail_handler(failing_parts={'b': 429, 'c': 404}, individual_calls=calls))
+
+    results = asyncio.run(gmail_client.get_messages_bulk(['a', 'b', 'c']))
+
+    # The rate-limited part is refetched, the deleted one is not
+    assert [m['id'] for m in results] == ['a', 'b']
+    assert calls == ['b']
+
+def test_get_messages_bulk_falls_back_when_batch_request_fails(monkeypatch):
+    calls = []
+    monkeypatch.setattr(gmail_client, 'BATCH_SIZE', 2)
+    use_mock_gmail(monkeypatch, gmail_handler(batch_status=503, individual_calls=calls))
+
+    results = asyncio.run(gmail_client.get_messages_bulk(['a', 'b', 'c']))
+
+    assert [m['id'] for m in results] == ['a', 'b', 'c']
+    assert sorted(calls) == ['a', 'b', 'c']
+
+def test_get_messages_bulk_does_not_refetch_rejected_batch(monkeypatch):
+    calls = []
+    use_mock_gmail(monkeypatch, gmail_handler(batch_status=400, individual_calls=calls))
+
+    results = asyncio.run(gmail_client.get_messages_bulk(['a', 'b']))
+
+    assert results == []
+    assert calls == []
+
+@pytest.mark.parametrize('batch_status, failing_parts', [(200, {'c': 503}), (500, None)])
+def test_list_and_fetch_selects_ids_before_fetching(monkeypatch, batch_status, failing_parts):
+    use_mock_gmail(monkeypatch, gmail_handler(batch_status=batch_status, failing_parts=failing_parts))
+
+    messages, fetched = asyncio.run(gmail_client.list_and_fetch(
+        'from:tlscontact.com', select=lambda ids: [i for i in ids if i != 'a']
+    ))
+
+    assert [m['id'] for m in messages] == ['a', 'b', 'c']
+    assert [m['id'] for m in fetched] == ['b', 'c']
@@ -1,145 +1,135 @@
-#!/usr/bin/env python3
-"""
-telegram_test_status.py
+import asyncio
+import pytest
 
-Async /test handler (python-telegram-bot v20+)
+# The /test status handler lives in the app package; re-exported here for integration runs
+from app.telegram_status import register_handlers, check_http, check_tcp
 
-Checks:
-- PROJECT_URL (HTTP)
-- or PROJECT_HOST + PROJECT_PORT (TCP)
-"""
+def test_check_tcp_reachable():
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await check_tcp('127.0.0.1', port)
 
-from __future__ import annotations
+    ok, info = asyncio.run(run())
 
-import os
-import time
-import asyncio
-from typing import Tuple, Optional
-from importlib import import_module
+    assert ok
+    assert 'reachable' in info
+
+def test_do_check_coalesces_concurrent_calls(monkeypatch):
+    from app import telegram_status
+
+    calls = []
+
+    async def fake_check_http(url):
+        calls.append(url)
+        await asyncio.sleep(0.01)
+        return True, 'HTTP 200'
+
+    monkeypatch.setattr(telegram_status, 'check_http', fake_check_http)
+    monkeypatch.setattr(telegram_status, 'PROJECT_URL', 'http://example.invalid/')
+    monkeypatch.setattr(telegram_status, '_result_cache', None)
+
+    async def run():
+        first = await asyncio.gather(*(telegram_status.do_check() for _ in range(5)))
+        cached = await telegram_status.do_check()
+        return first, cached
+
+    first, cached = asyncio.run(run())
+
+    assert first == [(True, 'HTTP 200')] * 5
+    assert cached == (True, 'HTTP 200')
+    assert len(calls) == 1
+
+def test_test_command_replies_once_for_fast_probe(monkeypatch):
+    from unittest.mock import AsyncMock, MagicMock
+    from app import telegram_status
+
+    monkeypatch.setattr(telegram_status, 'do_check', AsyncMock(return_value=(True, 'HTTP 200')))
+    update = MagicMock()
+    update.effective_message.reply_text = AsyncMock()
+
+    asyncio.run(telegram_status.test_command(update, None))
 
-# --- Load .env safely ---
-try:
-    from dotenv import load_dotenv, find_dotenv
-    dotenv_path = find_dotenv()
-    if dotenv_path:
-        load_dotenv(dotenv_path)
-except Exception:
-    pass
+    update.effective_message.reply_text.assert_awaited_once_with('Project status: ONLINE ✅\nHTTP 200')
 
+def closed_port():
+    import socket
 
-# --- Config helpers ---
-def get_config(name: str, modules: list[str]) -> Optional[str]:
-    if os.getenv(name):
-        return os.getenv(name)
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
 
-    for module_name in modules:
+def test_check_tcp_tries_every_resolved_address(monkeypatch):
+    import time
+    from app import telegram_status
+
+    async def run():
+        server = await asyncio.start_server(lambda reader, writer: writer.close(), '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        # First record is unreachable, like an IPv6 address with no route
+        monkeypatch.setitem(telegram_status._resolved, ('status.test', port),
+                            (time.monotonic(), [('127.0.0.1', closed_port()), ('127.0.0.1', port)]))
+        async with server:
+            return await check_tcp('status.test', port)
+
+    ok, info = asyncio.run(run())
+
+    assert ok
+    assert 'reachable' in info
+
+def test_check_tcp_evicts_failed_addresses(monkeypatch):
+    import time
+    from app import telegram_status
+
+    port = closed_port()
+    monkeypatch.setitem(telegram_status._resolved, ('status.test', port),
+                        (time.monotonic(), [('127.0.0.1', port)]))
+
+    ok, _ = asyncio.run(check_tcp('status.test', port))
+
+    assert not ok
+    assert ('status.test', port) not in telegram_status._resolved
+
+def test_check_http_reports_status():
+    web = pytest.importorskip('aiohttp.web')
+    from app import telegram_status
+
+    async def index(request):
+        return web.Response(text='ok')
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/', index)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        port = runner.addresses[0][1]
         try:
-            mod = import_module(module_name)
-        except Exception:
-            continue
+            return await check_http(f"http://127.0.0.1:{port}/")
+        finally:
+            await telegram_status.close_session()
+            await runner.cleanup()
+
+    ok, info = asyncio.run(run())
+
+    assert ok
+    assert info.startswith('HTTP 200')
 
-        if hasattr(mod, name):
-            return getattr(mod, name)
+def test_register_handlers_chains_post_shutdown(monkeypatch):
+    pytest.importorskip('telegram')
+    from unittest.mock import AsyncMock, MagicMock
+    from app import telegram_status
 
-        if hasattr(mod, name.lower()):
-            return getattr(mod, name.lower())
-
-        if hasattr(mod, "CONFIG") and isinstance(mod.CONFIG, dict):
-            return mod.CONFIG.get(name) or mod.CONFIG.get(name.lower())
-
-    return None
-
-
-COMMON_CONFIG_MODULES = [
-    "config",
-    "settings",
-    "app.config",
-    "app.settings",
-]
-
-# --- Defaults ---
-FALLBACK_URL = "https://tlscontact-visa-watcher-py-production-a1a8.up.railway.app/"
-CHECK_TIMEOUT = int(os.getenv("CHECK_TIMEOUT", "5"))
-
-# --- Resolve target ---
-PROJECT_URL = os.getenv("PROJECT_URL") or get_config("PROJECT_URL", COMMON_CONFIG_MODULES) or FALLBACK_URL
-PROJECT_HOST = os.getenv("PROJECT_HOST") or get_config("PROJECT_HOST", COMMON_CONFIG_MODULES)
-
-try:
-    PROJECT_PORT = int(os.getenv("PROJECT_PORT") or get_config("PROJECT_PORT", COMMON_CONFIG_MODULES) or 0)
-except ValueError:
-    PROJECT_PORT = 0
-
-
-# --- Networking ---
-import aiohttp
-from telegram import Update
-from telegram.ext import (
-    Application,
-    CommandHandler,
-    MessageHandler,
-    ContextTypes,
-    filters,
-)
-
-
-async def check_http(url: str) -> Tuple[bool, str]:
-    start = time.monotonic()
-    timeout = aiohttp.ClientTimeout(total=CHECK_TIMEOUT)
-
-    try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, allow_redirects=True) as resp:
-                elapsed = int((time.monotonic() - start) * 1000)
-                ok = 200 <= resp.status < 400
-                return ok, f"HTTP {resp.status} — {elapsed}ms"
-    except Exception as e:
-        elapsed = int((time.monotonic() - start) * 1000)
-        return False, f"HTTP error: {e} — {elapsed}ms"
-
-
-async def check_tcp(host: str, port: int) -> Tuple[bool, str]:
-    start = time.monotonic()
-    try:
-        reader, writer = await asyncio.wait_for(
-            asyncio.open_connection(host, port),
-            timeout=CHECK_TIMEOUT,
-        )
-        writer.close()
-        await writer.wait_closed()
-        elapsed = int((time.monotonic() - start) * 1000)
-        return True, f"TCP {host}:{port} reachable — {elapsed}ms"
-    except Exception as e:
-        elapsed = int((time.monotonic() - start) * 1000)
-        return False, f"TCP error: {e} — {elapsed}ms"
-
-
-async def do_check() -> Tuple[bool, str]:
-    if PROJECT_URL:
-        return await check_http(PROJECT_URL)
-
-    if PROJECT_HOST and PROJECT_PORT:
-        return await check_tcp(PROJECT_HOST, PROJECT_PORT)
-
-    return False, "No target configured (PROJECT_URL or PROJECT_HOST + PROJECT_PORT)."
-
-
-# --- Telegram handlers ---
-async def test_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    msg = await update.effective_message.reply_text("🔍 Checking project status...")
-    ok, info = await do_check()
-    status = "ONLINE ✅" if ok else "OFFLINE ❌"
-    await msg.edit_text(f"Project status: {status}\n{info}")
-
-
-async def test_text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    text = (update.effective_message.text or "").strip().lower()
-    if text == "test":
-        await test_command(update, context)
+    close_session = AsyncMock()
+    monkeypatch.setattr(telegram_status, 'close_session', close_session)
+    previous_post_shutdown = AsyncMock()
+    application = MagicMock()
+    application.post_shutdown = previous_post_shutdown
 
+    register_handlers(application)
+    asyncio.run(application.post_shutdown(application))
 
-def register_handlers(application: Application) -> None:
-    application.add_handler(CommandHandler("test", test_command))
-    application.add_handler(
-        MessageHandler(filters.TEXT & ~filters.COMMAND, test_text_handler)
-    )
+    assert application.add_handler.call_count == 2
+    previous_post_shutdown.assert_awaited_once_with(application)
+    close_session.assert_awaited_once()
@@ -0,0 +1,12 @@
+from collections import Counter
+
+from app.main import app
+
+def test_routes_registered_once():
+    routes = Counter(
+        (route.path, method)
+        for route in app.routes
+        for method in getattr(route, 'methods', None) or ()
+    )
+    duplicates = [key for key, count in routes.items() if count > 1]
+    assert duplicates == []
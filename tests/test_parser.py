@@ -1,53 +1,60 @@
-import sys
 import os
+import re
+import functools
 import pytest
 from datetime import datetime
-
-# Add parent directory to path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from types import MappingProxyType
 
 from app.parser import parse_message, format_for_telegram
 
 FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
 
 def load_fixture(filename):
-    file_path = os.path.join(FIXTURES_DIR, filename)
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    lines = content.split('\n')
-    message = {
-        'id': filename.replace('.txt', ''),
-        'from': '',
-        'subject': '',
-        'snippet': '',
-        'body': ''
-    }
+    # Tests may add keys to the message, so each one gets its own copy
+    return dict(_read_fixture(filename))
 
-    in_body = False
-    body_lines = []
+# A line holding only '---': the first one ends the headers, later ones are dropped from the body
+SEPARATOR_LINE_REGEX = re.compile(r'\n[^\S\n]*---[^\S\n]*(?=\n|$)')
+HEADER_REGEX = re.compile(r'^(From|Subject): (.*)$', re.MULTILINE)
 
-    for line in lines:
-        line = line.replace('\r', '')
-        if line.strip() == '---':
-            in_body = True
-            continue
+@functools.lru_cache(maxsize=None)
+def _read_fixture(filename):
+    file_path = os.path.join(FIXTURES_DIR, filename)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    # Normalize newlines like text mode does, then decode the whole file once
+    content = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n').decode('utf-8')
+
+    # Read-only, so a test can never corrupt the cached copy other tests share
+    return MappingProxyType(parse_fixture(filename, content))
+
+def parse_fixture(filename, content):
+    # Leading newline lets a separator on the first line match like any other
+    text = '\n' + content
+    separator = SEPARATOR_LINE_REGEX.search(text)
+    if separator:
+        head = text[1:separator.start()]
+        body = SEPARATOR_LINE_REGEX.sub('', text[separator.end():])[1:]
+    else:
+        head, body = text[1:], ''
 
-        if not in_body:
-            if line.startswith('From: '):
-                message['from'] = line[6:].strip()
-            elif line.startswith('Subject: '):
-                message['subject'] = line[9:].strip()
-        else:
-            body_lines.append(line)
+    headers = {key: value.strip() for key, value in HEADER_REGEX.findall(head)}
 
-    message['body'] = '\n'.join(body_lines)
-    message['snippet'] = ' '.join(body_lines[:3])[:200]
+    return {
+        'id': filename.replace('.txt', ''),
+        'from': headers.get('From', ''),
+        'subject': headers.get('Subject', ''),
+        'snippet': ' '.join(body.split('\n', 3)[:3])[:200],
+        'body': body
+    }
 
-    return message
+# Every key parse_message reads; tests override only what they exercise
+BASE_MESSAGE = {'id': '', 'from': '', 'subject': '', 'snippet': '', 'body': ''}
 
 def test_detect_tls_by_domain():
     message = {
+        **BASE_MESSAGE,
         'id': 'test1',
         'from': 'noreply@tlscontact.com',
         'subject': 'Test email',
@@ -59,6 +66,7 @@ def test_detect_tls_by_domain():
 
 def test_detect_tls_by_keywords():
     message = {
+        **BASE_MESSAGE,
         'id': 'test2',
         'from': 'noreply@example.com',
         'subject': 'Rendez-vous confirmation',
@@ -70,6 +78,7 @@ def test_detect_tls_by_keywords():
 
 def test_not_detect_non_tls():
     message = {
+        **BASE_MESSAGE,
         'id': 'test3',
         'from': 'noreply@example.com',
         'subject': 'Newsletter',
@@ -92,10 +101,8 @@ def test_fixture_1_numeric_french_date():
     assert 'T' in result['date']
 
     # Should parse to January 15, 2026
-    dt = datetime.fromisoformat(result['date'].replace('Z', '+00:00'))
-    assert dt.year == 2026
-    assert dt.month == 1
-    assert dt.day == 15
+    dt = result['dateObj']
+    assert (dt.year, dt.month, dt.day) == (2026, 1, 15)
 
 def test_fixture_2_natural_language_english_date():
     message = load_fixture('sample_tls_email_2.txt')
@@ -105,10 +112,8 @@ def test_fixture_2_natural_language_english_date():
     assert result['parsed'] is True
     assert result['date'] is not None
 
-    dt = datetime.fromisoformat(result['date'].replace('Z', '+00:00'))
-    assert dt.year == 2026
-    assert dt.month == 1
-    assert dt.day == 22
+    dt = result['dateObj']
+    assert (dt.year, dt.month, dt.day) == (2026, 1, 22)
 
 def test_fixture_4_attachment_simulation():
     message = load_fixture('sample_tls_attachment.txt')
@@ -117,21 +122,18 @@ def test_fixture_4_attachment_simulation():
     assert result['isTls'] is True
     assert result['parsed'] is True
     
-    dt = datetime.fromisoformat(result['date'].replace('Z', '+00:00'))
-    assert dt.year == 2026
-    assert dt.month == 1
-    assert dt.day == 25
+    dt = result['dateObj']
+    assert (dt.year, dt.month, dt.day) == (2026, 1, 25)
     assert 'tlsvisa.com/confirm' in result['link']
 
-def test_variant_domains():
-    variants = [
-        'visa@tls-contact.com',
-        'noreply@tlsvisa.com',
-        'info@tls-contact.fr'
-    ]
-    for from_email in variants:
-        result = parse_message({'from': from_email, 'subject': 'Test', 'body': 'Test'})
-        assert result['isTls'] is True
+@pytest.mark.parametrize('from_email', [
+    'visa@tls-contact.com',
+    'noreply@tlsvisa.com',
+    'info@tls-contact.fr'
+])
+def test_variant_domains(from_email):
+    result = parse_message({**BASE_MESSAGE, 'from': from_email, 'subject': 'Test', 'body': 'Test'})
+    assert result['isTls'] is True
 
 def test_fixture_3_ambiguous_email():
     message = load_fixture('sample_tls_email_3.txt')
@@ -145,12 +147,12 @@ def test_fixture_3_ambiguous_email():
     else:
         assert result['parsed'] is False
 
-def test_link_extraction_fixtures():
-    for fix in ['sample_tls_email_1.txt', 'sample_tls_email_2.txt']:
-        message = load_fixture(fix)
-        result = parse_message(message)
-        assert result['link'] is not None
-        assert 'tlscontact.com' in result['link']
+@pytest.mark.parametrize('fixture', ['sample_tls_email_1.txt', 'sample_tls_email_2.txt'])
+def test_link_extraction_fixtures(fixture):
+    message = load_fixture(fixture)
+    result = parse_message(message)
+    assert result['link'] is not None
+    assert 'tlscontact.com' in result['link']
 
 def test_telegram_formatting():
     message = load_fixture('sample_tls_email_1.txt')
@@ -164,3 +166,70 @@ def test_telegram_formatting():
     assert 'Subject:' in formatted
     assert 'Link:' in formatted
     assert message['id'] in formatted
+
+def test_numeric_date_is_day_first():
+    year = datetime.now().year
+    message = {
+        **BASE_MESSAGE,
+        'id': 'test_dayfirst',
+        'from': 'noreply@tlscontact.com',
+        'subject': 'Rendez-vous',
+        'body': f'Date du rendez-vous: 05/01/{year}'
+    }
+    result = parse_message(message)
+
+    dt = datetime.fromisoformat(result['date'])
+    assert (dt.year, dt.month, dt.day) == (year, 1, 5)
+
+def test_natural_date_skips_lines_without_dates():
+    message = {
+        **BASE_MESSAGE,
+        'id': 'test_candidate_lines',
+        'from': 'noreply@tlscontact.com',
+        'subject': 'Appointment update',
+        'body': 'Please arrive tomorrow morning\nDate: 15 March 2027 09:30'
+    }
+    result = parse_message(message)
+
+    dt = datetime.fromisoformat(result['date'])
+    assert (dt.year, dt.month, dt.day) == (2027, 3, 15)
+
+def test_telegram_formatting_spam_label():
+    message = load_fixture('sample_tls_email_1.txt')
+    message['labelIds'] = ['CATEGORY_UPDATES', 'SPAM']
+    parsed = parse_message(message)
+
+    assert parsed['labels'] == frozenset({'CATEGORY_UPDATES', 'SPAM'})
+    assert 'Spam Detect' in format_for_telegram(parsed, message['id'])
+
+@pytest.mark.parametrize('line', ['Date: January, 15', f'Date: January, 15 {datetime.now().year}'])
+def test_natural_date_with_comma_after_month(line):
+    message = {
+        **BASE_MESSAGE,
+        'id': 'test_month_comma',
+        'from': 'noreply@tlscontact.com',
+        'subject': 'Appointment update',
+        'body': line
+    }
+    result = parse_message(message)
+
+    assert result['parsed'] is True
+    assert (result['dateObj'].month, result['dateObj'].day) == (1, 15)
+
+@pytest.mark.parametrize('line, month, day', [
+    ('Date: 1st of March', 3, 1),
+    ('Date: the 22nd of January', 1, 22),
+    ('Date: Tuesday, 3rd of February', 2, 3),
+])
+def test_natural_date_with_of_before_month(line, month, day):
+    message = {
+        **BASE_MESSAGE,
+        'id': 'test_ordinal_of',
+        'from': 'noreply@tlscontact.com',
+        'subject': 'Appointment update',
+        'body': line
+    }
+    result = parse_message(message)
+
+    assert result['parsed'] is True
+    assert (result['dateObj'].month, result['dateObj'].day) == (month, day)
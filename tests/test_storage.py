@@ -0,0 +1,68 @@
+
+from app.storage import SqliteStorage
+
+def test_mark_processed_many(tmp_path):
+    storage = SqliteStorage(str(tmp_path / 'processed.db'))
+    try:
+        storage.mark_processed_many(['a', 'b', 'a'])
+        storage.mark_processed('c')
+
+        assert storage.has_processed('a')
+        assert storage.has_processed('b')
+        assert storage.has_processed('c')
+        assert not storage.has_processed('d')
+    finally:
+        storage.close()
+
+def test_processed_ids_persist(tmp_path):
+    db_path = str(tmp_path / 'processed.db')
+    storage = SqliteStorage(db_path)
+    storage.mark_processed_many(['a'])
+    storage.close()
+
+    reopened = SqliteStorage(db_path)
+    try:
+        assert reopened.has_processed('a')
+    finally:
+        reopened.close()
+
+def test_cleanup_forgets_old_ids(tmp_path):
+    storage = SqliteStorage(str(tmp_path / 'processed.db'))
+    try:
+        storage.mark_processed('old')
+        storage._get_conn().execute("UPDATE processed_messages SET processed_at = 0")
+        storage.cleanup(older_than_days=30)
+
+        assert not storage.has_processed('old')
+    finally:
+        storage.close()
+
+def test_unprocessed_keeps_order(tmp_path):
+    storage = SqliteStorage(str(tmp_path / 'processed.db'))
+    try:
+        storage.mark_processed_many(['b'])
+
+        assert storage.unprocessed(['c', 'b', 'a']) == ['c', 'a']
+    finally:
+        storage.close()
+
+def test_concurrent_writers_share_one_connection(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    db_path = str(tmp_path / 'processed.db')
+    storage = SqliteStorage(db_path)
+    try:
+        batches = [[f"{worker}-{i}" for i in range(50)] for worker in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(storage.mark_processed_many, batches))
+
+        expected = [message_id for batch in batches for message_id in batch]
+        assert storage.unprocessed(expected) == []
+    finally:
+        storage.close()
+
+    reopened = SqliteStorage(db_path)
+    try:
+        assert reopened.unprocessed(expected) == []
+    finally:
+        reopened.close()
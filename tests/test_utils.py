@@ -0,0 +1,31 @@
+import asyncio
+
+from app.utils import RateLimiter, escape_html, is_transient_error
+
+def test_rate_limiter_burst_then_wait():
+    limiter = RateLimiter(2, 50.0)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(3):
+            await limiter.acquire(1)
+        return loop.time() - start
+
+    elapsed = asyncio.run(run())
+
+    # Two tokens are available immediately, the third needs ~1/50s of refill
+    assert 0.01 <= elapsed < 0.5
+    assert limiter.tokens < 1
+
+def test_escape_html():
+    assert escape_html('<b>"R&D"</b>') == '&lt;b&gt;&quot;R&amp;D&quot;&lt;/b&gt;'
+    assert escape_html("l'heure") == "l'heure"
+    assert escape_html('') == ''
+    assert escape_html(None) == ''
+
+def test_is_transient_error():
+    assert is_transient_error(Exception('Read Timeout'))
+    assert is_transient_error(Exception('ECONNRESET by peer'))
+    assert not is_transient_error(Exception('invalid_grant'))
+    assert not is_transient_error(None)